@@ -4,27 +4,157 @@ import os
 
 from adapters.api.audio_play_service_impl import AudioPlayServiceImpl
 from adapters.api.authentication_service_impl import AuthenticationServiceImpl
-from adapters.api.tokens_impl import DictTokenStore
+from adapters.api.cached_audio_play_service import CachingAudioPlayService
+from adapters.api.catalog import SqliteCatalog
+from adapters.api.covers_impl import SqliteCoverStore
+from adapters.api.http_client import create_http_client
+from adapters.api.indexed_audio_play_service import IndexedAudioPlayService
+from adapters.api.instrumented_services import \
+    InstrumentedAudioPlayService, InstrumentedAuthenticationService
+from adapters.api.response_cache import ResponseCache
+from adapters.api.token_refresher import TokenRefresher
+from adapters.api.tokens_impl import CachedTokenStore, DictTokenStore
+from adapters.bot_metrics import api_latency, collect_commands, \
+    collect_render_cache, collect_response_cache, collect_sends, \
+    collect_token_refresher, collect_update_processor, collect_updates, \
+    loop_lag_monitor
+from adapters.catalog_sync import CatalogSync
+from adapters.handlers.inline_search import InlineSearchHandler
 from adapters.logic_impl import LogicImpl
+from adapters.logs import configure_logging
+from adapters.metrics import MetricsRegistry
+from adapters.search_index import SearchIndex
 from adapters.telegram_bot import TelegramBot
+from api.tokens import TokenStore
+
+def create_token_store() -> TokenStore:
+    """
+    Creates token store configured by environment.
+    :return: token store.
+    """
+    match os.getenv("TOKEN_STORE") or "dict":
+        case "sqlite":
+            from adapters.api.sqlite_tokens_impl import SqliteTokenStore
+            path = os.getenv("TOKEN_STORE_PATH") or ".cache/tokens.sqlite"
+            return CachedTokenStore(SqliteTokenStore(path), negative_ttl=60)
+        case "redis":
+            import redis.asyncio
+            from adapters.api.redis_tokens_impl import RedisTokenStore
+            client = redis.asyncio.Redis.from_url(os.getenv("REDIS_URL"))
+            # Store is shared, so users without token are not remembered.
+            return CachedTokenStore(RedisTokenStore(client))
+        case _:
+            return DictTokenStore()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
 
 if __name__ == "__main__":
     load_dotenv()
+    configure_logging(
+        level=os.getenv("LOG_LEVEL") or logging.INFO,
+        sample_every=int(os.getenv("LOG_SAMPLE_EVERY") or 1)
+    )
     
     name = os.getenv("TELEGRAM_BOT_NAME")
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     api_base = os.getenv("API_BASE")
+    workers = int(os.getenv("UPDATE_WORKERS") or 1)
+    queue_size = int(os.getenv("UPDATE_QUEUE_SIZE") or 1000)
+
+    webhook = None
+    if os.getenv("UPDATE_MODE") == "webhook":
+        from adapters.webhook_server import WebhookConfig
+        secret_token = os.getenv("WEBHOOK_SECRET_TOKEN") or None
+        webhook = WebhookConfig(
+            # Without secret token only local posts are accepted.
+            listen=os.getenv("WEBHOOK_LISTEN")
+            or ("0.0.0.0" if secret_token else "127.0.0.1"),
+            port=int(os.getenv("WEBHOOK_PORT") or 8443),
+            path=os.getenv("WEBHOOK_PATH") or "/telegram",
+            secret_token=secret_token,
+            url=os.getenv("WEBHOOK_URL") or None,
+        )
     
-    ts = DictTokenStore()
-    aus = AuthenticationServiceImpl(api_base)
-    aps = AudioPlayServiceImpl(api_base)
-    
-    logic = LogicImpl(aus, aps, ts)
-    bot = TelegramBot(name, token, logic)
+    registry = None
+    if os.getenv("METRICS_PORT"):
+        registry = MetricsRegistry()
+
+    client = create_http_client()
+    cs = SqliteCoverStore(".cache/covers.sqlite")
+    aus = AuthenticationServiceImpl(api_base, client)
+    remote_aps = AudioPlayServiceImpl(api_base, client)
+    if registry is not None:
+        aus = InstrumentedAuthenticationService(aus, api_latency(registry))
+        remote_aps = InstrumentedAudioPlayService(
+            remote_aps, api_latency(registry)
+        )
+    ts = TokenRefresher(
+        aus,
+        create_token_store(),
+        margin=float(os.getenv("TOKEN_REFRESH_MARGIN") or 300)
+    )
+    response_cache = ResponseCache(
+        ".cache/audio_plays.sqlite", max_stale=86400
+    )
+    catalog = None
+    if os.getenv("CATALOG_SYNC"):
+        catalog = SqliteCatalog(".cache/catalog.sqlite")
+    cached_aps = CachingAudioPlayService(
+        remote_aps, response_cache, catalog=catalog
+    )
+    aps = cached_aps
+    index = None
+    if os.getenv("LOCAL_SEARCH"):
+        index = SearchIndex()
+        aps = IndexedAudioPlayService(
+            aps,
+            index,
+            slow_after=float(os.getenv("LOCAL_SEARCH_SLOW_AFTER") or 1)
+        )
+
+    logic = LogicImpl(aus, aps, ts, cs)
+    inline_logic = InlineSearchHandler(aps)
+    bot = TelegramBot(
+        name, token, logic, workers, webhook, queue_size, inline_logic
+    )
+    bot.on_start(ts.start)
+
+    if catalog is not None:
+        sync = CatalogSync(
+            cached_aps,
+            catalog,
+            cache=cached_aps,
+            index=index,
+            cs=cs,
+            interval=float(os.getenv("CATALOG_SYNC_INTERVAL") or 3600),
+            snapshot=os.getenv("CATALOG_SNAPSHOT") or None
+        )
+        bot.on_start(sync.start)
+        bot.on_stop(sync.stop)
+
+    if registry is not None:
+        from adapters.metrics_server import MetricsServer
+        collect_updates(registry, bot.update_policy)
+        if bot.update_processor is not None:
+            collect_update_processor(registry, bot.update_processor)
+        collect_commands(registry, logic.middlewares)
+        collect_response_cache(registry, response_cache)
+        collect_render_cache(registry, logic.render_cache)
+        collect_sends(registry, bot.send_scheduler)
+        collect_token_refresher(registry, ts)
+        monitor = loop_lag_monitor(registry)
+        server = MetricsServer(
+            registry,
+            listen=os.getenv("METRICS_LISTEN") or "127.0.0.1",
+            port=int(os.getenv("METRICS_PORT"))
+        )
+        bot.on_start(monitor.start)
+        bot.on_start(server.start)
+        bot.on_stop(server.stop)
+        bot.on_stop(monitor.stop)
 
+    # Registered last, so that they run after other stop callbacks
+    # which may still make requests, cache responses or put tokens.
+    bot.on_stop(response_cache.close)
+    bot.on_stop(client.aclose)
+    bot.on_stop(ts.close)
     bot.start()
@@ -1,36 +1,37 @@
-import requests_cache
 from typing import Any
 from urllib.parse import urlencode
 
 from uuid import UUID
 import logging
 
-import requests
+import httpx
 
 from api.audio_play_service import AudioPlayService
 from api.model.audio_play import AudioPlay, AudioPlayLocation, \
-    SearchAudioPlaysResponse
+    ListAudioPlaysResponse, SearchAudioPlaysResponse
 from api.model.error_response import ErrorResponse
 
 
 class AudioPlayServiceImpl(AudioPlayService):
     """Service implementation."""
 
-    def __init__(self, api_base: str):
+    def __init__(self, api_base: str, client: httpx.AsyncClient):
         """
         Constructor.
         :param api_base: API base address.
+        :param client: shared HTTP client to make requests with.
         """
         self._base = api_base if api_base.endswith(
             "/") else api_base + "/"
-        self._session = requests_cache.CachedSession(
-            ".cache/audio_plays",
-            expire_after=3600)
+        self._client = client
 
-    def get(self, audio_play_id: UUID) -> AudioPlay | ErrorResponse | None:
+    async def get(
+            self,
+            audio_play_id: UUID
+    ) -> AudioPlay | ErrorResponse | None:
         endpoint = self._base + f"audioPlays/{audio_play_id}"
         try:
-            response = self._session.get(endpoint)
+            response = await self._client.get(endpoint)
             if response.status_code == 200:
                 data = response.json()
                 return AudioPlay(**data)
@@ -38,25 +39,25 @@ class AudioPlayServiceImpl(AudioPlayService):
                 data = response.json()
                 return ErrorResponse(**data)
             else:
-                return logging.warn("Received empty body.")
+                return logging.warning("Received empty body.")
         except Exception:
             return logging.exception("Error while getting audio play.")
 
-    def search(
+    async def search(
             self,
             query: str,
             limit: int | None = None
     ) -> SearchAudioPlaysResponse | ErrorResponse | None:
         if not query:
             return None
-        
+
         params = self._encode_params({
             "query": query,
             "limit": limit
         })
         endpoint = self._base + f"audioPlays:search?{params}"
         try:
-            response = self._session.get(endpoint)
+            response = await self._client.get(endpoint)
             if response.status_code == 200:
                 data = response.json()
                 return SearchAudioPlaysResponse(**data)
@@ -64,18 +65,43 @@ class AudioPlayServiceImpl(AudioPlayService):
                 data = response.json()
                 return ErrorResponse(**data)
             else:
-                return logging.warn("Received empty body.")
+                return logging.warning("Received empty body.")
         except Exception:
             return logging.exception("Error while searching audio plays.")
 
-    def get_location(
+    async def list(
+            self,
+            page_size: int,
+            page_token: str | None = None,
+            sync_token: str | None = None
+    ) -> ListAudioPlaysResponse | ErrorResponse | None:
+        params = self._encode_params({
+            "page_size": page_size,
+            "page_token": page_token,
+            "sync_token": sync_token
+        })
+        endpoint = self._base + f"audioPlays?{params}"
+        try:
+            response = await self._client.get(endpoint)
+            if response.status_code == 200:
+                data = response.json()
+                return ListAudioPlaysResponse(**data)
+            elif response.content:
+                data = response.json()
+                return ErrorResponse(**data)
+            else:
+                return logging.warning("Received empty body.")
+        except Exception:
+            return logging.exception("Error while listing audio plays.")
+
+    async def get_location(
             self,
             token: str,
             audio_play_id: UUID
     ) -> AudioPlayLocation | ErrorResponse | None:
         endpoint = self._base + f"audioPlays/{audio_play_id}/location"
         try:
-            response = requests.get(endpoint, headers={
+            response = await self._client.get(endpoint, headers={
                 "Authorization": f"Bearer {token}",
             })
             if response.status_code == 200:
@@ -85,10 +111,19 @@ class AudioPlayServiceImpl(AudioPlayService):
                 data = response.json()
                 return ErrorResponse(**data)
             else:
-                return logging.warn("Received empty body.")
+                return logging.warning("Received empty body.")
         except Exception:
             return logging.exception("Error while getting audio play location.")
 
+    async def get_cover(self, cover_uri: str) -> bytes | None:
+        try:
+            response = await self._client.get(cover_uri)
+            if response.status_code == 200:
+                return response.content
+            return None
+        except Exception:
+            return logging.exception("Error while getting cover.")
+
     @staticmethod
     def _encode_params(params: dict[str, Any]) -> str:
         """
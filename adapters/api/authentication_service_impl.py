@@ -1,6 +1,6 @@
-from abc import ABC, abstractmethod
 import logging
-import requests
+
+import httpx
 
 from api.authentication_service import AuthenticationService
 from api.model.authentication import AuthenticateUserRequest, \
@@ -11,21 +11,24 @@ from api.model.error_response import ErrorResponse
 class AuthenticationServiceImpl(AuthenticationService):
     """Service implementation."""
 
-    def __init__(self, api_base: str):
+    def __init__(self, api_base: str, client: httpx.AsyncClient):
         """
         Constructor.
         :param api_base: API base address.
+        :param client: shared HTTP client to make requests with.
         """
         self._base = api_base if api_base.endswith(
             "/") else api_base + "/"
+        self._client = client
 
-    def login(
+    async def login(
             self,
             request: AuthenticateUserRequest
     ) -> AuthenticateUserResponse | ErrorResponse | None:
         endpoint = self._base + f"users:authenticate"
         try:
-            response = requests.post(endpoint, json=request.model_dump())
+            response = await self._client.post(
+                endpoint, json=request.model_dump())
             if response.status_code == 200:
                 data = response.json()
                 return AuthenticateUserResponse(**data)
@@ -33,17 +36,18 @@ class AuthenticationServiceImpl(AuthenticationService):
                 data = response.json()
                 return ErrorResponse(**data)
             else:
-                return logging.warn("Received empty body.")
+                return logging.warning("Received empty body.")
         except Exception:
             return logging.exception("Error while log in.")
 
-    def register(
+    async def register(
             self,
             request: CreateUserRequest,
     ) -> AuthenticateUserResponse | ErrorResponse | None:
         endpoint = self._base + f"users"
         try:
-            response = requests.post(endpoint, json=request.model_dump())
+            response = await self._client.post(
+                endpoint, json=request.model_dump())
             if response.status_code == 201:
                 data = response.json()
                 return AuthenticateUserResponse(**data)
@@ -51,6 +55,6 @@ class AuthenticationServiceImpl(AuthenticationService):
                 data = response.json()
                 return ErrorResponse(**data)
             else:
-                return logging.warn("Received empty body.")
+                return logging.warning("Received empty body.")
         except Exception:
             return logging.exception("Error while registering.")
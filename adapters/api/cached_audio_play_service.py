@@ -0,0 +1,173 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from adapters.api.catalog import SqliteCatalog
+from adapters.api.response_cache import ResponseCache
+from api.audio_play_service import AudioPlayService
+from api.model.audio_play import AudioPlay, AudioPlayLocation, \
+    ListAudioPlaysResponse, SearchAudioPlaysResponse
+from api.model.error_response import ErrorResponse
+
+_GET = "get"
+_SEARCH = "search"
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class CachingAudioPlayService(AudioPlayService):
+    """
+    Audio play service caching successful responses of another one.
+    Audio plays found by search are cached by ID as well, so getting
+    one of search results doesn't need a request. Locations are
+    user-specific and covers are cached by messenger, so these calls
+    are passed through.
+
+    At most one request per key is made at a time, concurrent callers
+    wait for its result. Expired entries the cache still keeps are
+    returned right away while they are renewed in background.
+
+    If local catalog is given, audio plays missing in cache are looked
+    up there before being requested, so the catalog is read lazily
+    rather than copied to cache.
+    """
+
+    def __init__(
+            self,
+            aps: AudioPlayService,
+            cache: ResponseCache,
+            get_ttl: float = 3600.0,
+            search_ttl: float = 600.0,
+            catalog: SqliteCatalog | None = None
+    ):
+        """
+        Constructor.
+        :param aps: service to cache responses of.
+        :param cache: cache to store responses in.
+        :param get_ttl: time to live of audio plays got by ID.
+        :param search_ttl: time to live of search results.
+        :param catalog: local catalog to look audio plays up in.
+        """
+        self._aps = aps
+        self._cache = cache
+        self._get_ttl = get_ttl
+        self._search_ttl = search_ttl
+        self._catalog = catalog
+        self._in_flight: dict[tuple[str, str], asyncio.Task] = {}
+
+    async def get(
+            self,
+            audio_play_id: UUID
+    ) -> AudioPlay | ErrorResponse | None:
+        async def fetch() -> AudioPlay | ErrorResponse | None:
+            response = None
+            if self._catalog is not None:
+                response = await asyncio.to_thread(
+                    self._catalog.get, audio_play_id
+                )
+            if response is None:
+                response = await self._aps.get(audio_play_id)
+            if isinstance(response, AudioPlay):
+                await self._cache.put(_GET, key, response, self._get_ttl)
+            return response
+
+        key = str(audio_play_id)
+        return await self._load(_GET, key, AudioPlay, fetch)
+
+    async def search(
+            self,
+            query: str,
+            limit: int | None = None
+    ) -> SearchAudioPlaysResponse | ErrorResponse | None:
+        async def fetch() -> SearchAudioPlaysResponse | ErrorResponse | None:
+            response = await self._aps.search(query, limit)
+            if isinstance(response, SearchAudioPlaysResponse):
+                await self._cache.put(
+                    _SEARCH, key, response, self._search_ttl
+                )
+                await self._cache.put_many(
+                    _GET,
+                    ((str(a.id), a) for a in response.audio_plays),
+                    self._get_ttl
+                )
+            return response
+
+        key = f"{limit}:{query}"
+        return await self._load(_SEARCH, key, SearchAudioPlaysResponse, fetch)
+
+    async def list(
+            self,
+            page_size: int,
+            page_token: str | None = None,
+            sync_token: str | None = None
+    ) -> ListAudioPlaysResponse | ErrorResponse | None:
+        return await self._aps.list(page_size, page_token, sync_token)
+
+    async def get_location(
+            self,
+            token: str,
+            audio_play_id: UUID
+    ) -> AudioPlayLocation | ErrorResponse | None:
+        return await self._aps.get_location(token, audio_play_id)
+
+    async def get_cover(self, cover_uri: str) -> bytes | None:
+        return await self._aps.get_cover(cover_uri)
+
+    async def remember(self, audio_plays: Iterable[AudioPlay]) -> None:
+        """
+        Caches audio plays got elsewhere, e.g. by catalog sync.
+        :param audio_plays: audio plays to cache by ID.
+        """
+        await self._cache.put_many(
+            _GET,
+            ((str(a.id), a) for a in audio_plays),
+            self._get_ttl
+        )
+
+    async def _load(
+            self,
+            namespace: str,
+            key: str,
+            model: type[M],
+            fetch: Callable[[], Awaitable[Any]]
+    ) -> M | Any:
+        """
+        Gets response from cache or requests it.
+        :param namespace: cache namespace.
+        :param key: key within namespace.
+        :param model: type of cached response.
+        :param fetch: makes request and caches its response.
+        :return: cached response, or response of the request.
+        """
+        found = await self._cache.lookup(namespace, key, model)
+        if found is not None:
+            value, fresh = found
+            if not fresh:
+                self._fetch_once(namespace, key, fetch)
+            return value
+        return await asyncio.shield(self._fetch_once(namespace, key, fetch))
+
+    def _fetch_once(
+            self,
+            namespace: str,
+            key: str,
+            fetch: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        """
+        Starts request unless the same one is already in flight.
+        :param namespace: cache namespace.
+        :param key: key within namespace.
+        :param fetch: makes request and caches its response.
+        :return: task of the request.
+        """
+        flight_key = (namespace, key)
+        task = self._in_flight.get(flight_key)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._in_flight[flight_key] = task
+            task.add_done_callback(
+                lambda _: self._in_flight.pop(flight_key, None)
+            )
+        return task
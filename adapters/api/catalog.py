@@ -0,0 +1,169 @@
+import os
+import sqlite3
+import threading
+from typing import Iterable, Iterator
+from uuid import UUID
+
+from adapters.api.model_schema import schema_version
+from api.model.audio_play import AudioPlay
+
+_SYNC_TOKEN = "sync_token"
+_SCHEMA = "schema"
+
+
+class SqliteCatalog:
+    """
+    Local copy of audio plays catalog in SQLite.
+    Audio plays are stored as JSON and validated when read. The
+    catalog remembers schema version of the model it was filled with,
+    and is emptied when opened by another version of code, so that
+    the next sync lists everything again.
+    Methods block, so they're meant to be called in a thread.
+    """
+
+    def __init__(self, path: str):
+        """
+        Constructor.
+        :param path: path to database file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS audio_plays ("
+            "id TEXT PRIMARY KEY, "
+            "data BLOB NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sync ("
+            "key TEXT PRIMARY KEY, "
+            "value TEXT NOT NULL)"
+        )
+        self._connection.commit()
+        self._lock = threading.Lock()
+        self._check_schema()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                "SELECT COUNT(*) FROM audio_plays"
+            ).fetchone()
+        return count
+
+    @property
+    def sync_token(self) -> str | None:
+        """Token of the last completed sync, None if there was none."""
+        return self._get_value(_SYNC_TOKEN)
+
+    @sync_token.setter
+    def sync_token(self, value: str | None) -> None:
+        self._set_value(_SYNC_TOKEN, value)
+
+    def get(self, audio_play_id: UUID) -> AudioPlay | None:
+        """
+        Gets audio play.
+        :param audio_play_id: ID of audio play.
+        :return: audio play, or None if it's not in catalog.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM audio_plays WHERE id = ?",
+                (str(audio_play_id),)
+            ).fetchone()
+        return AudioPlay.model_validate_json(row[0]) if row else None
+
+    def put_many(self, audio_plays: Iterable[AudioPlay]) -> list[AudioPlay]:
+        """
+        Puts audio plays, replacing stored versions.
+        :param audio_plays: audio plays to put.
+        :return: replaced versions that differ from the new ones.
+        """
+        audio_plays = list(audio_plays)
+        ids = [str(a.id) for a in audio_plays]
+        data = [a.model_dump_json() for a in audio_plays]
+        with self._lock, self._connection:
+            old = dict(self._connection.execute(
+                "SELECT id, data FROM audio_plays "
+                f"WHERE id IN ({', '.join('?' * len(ids))})",
+                ids
+            ).fetchall())
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO audio_plays VALUES (?, ?)",
+                zip(ids, data)
+            )
+        # Only replaced versions that differ are parsed.
+        return [
+            AudioPlay.model_validate_json(old[id_])
+            for id_, new in zip(ids, data)
+            if id_ in old and old[id_] != new
+        ]
+
+    def iterate(self, batch_size: int = 500) -> Iterator[list[AudioPlay]]:
+        """
+        Reads all audio plays in batches.
+        :param batch_size: number of audio plays in batch.
+        :return: generator of batches.
+        """
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._connection.execute(
+                    "SELECT id, data FROM audio_plays WHERE id > ? "
+                    "ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [AudioPlay.model_validate_json(data) for _, data in rows]
+
+    def close(self) -> None:
+        """Closes database."""
+        with self._lock:
+            self._connection.close()
+
+    def _check_schema(self) -> None:
+        """
+        Empties catalog filled with another schema version of model,
+        including catalogs that stored no version.
+        """
+        schema = schema_version(AudioPlay)
+        if self._get_value(_SCHEMA) == schema:
+            return
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM audio_plays")
+            self._connection.execute("DELETE FROM sync")
+            self._connection.execute(
+                "INSERT INTO sync VALUES (?, ?)", (_SCHEMA, schema)
+            )
+
+    def _get_value(self, key: str) -> str | None:
+        """
+        Reads value of sync table.
+        :param key: key of value.
+        :return: value, None if there's none.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM sync WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_value(self, key: str, value: str | None) -> None:
+        """
+        Writes value of sync table.
+        :param key: key of value.
+        :param value: value, None to delete it.
+        """
+        with self._lock, self._connection:
+            if value is None:
+                self._connection.execute(
+                    "DELETE FROM sync WHERE key = ?", (key,)
+                )
+            else:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO sync VALUES (?, ?)",
+                    (key, value)
+                )
@@ -0,0 +1,401 @@
+import bisect
+import mmap
+import os
+import struct
+from datetime import date
+from typing import Iterable, Iterator
+from uuid import UUID
+
+from api.model.audio_play import AudioPlay, AudioPlaySeries, CastMember, \
+    EpisodeType
+from api.model.external_resource import ExternalResource, \
+    ExternalResourceType
+from api.model.person import Person
+from api.model.release_date import DateAccuracy, ReleaseDate
+
+_MAGIC = b"DWTRCAT1"
+_NONE = 0xFFFFFFFF
+_NONE_INT = -2 ** 31
+
+_ACCURACIES = list(DateAccuracy)
+_EPISODE_TYPES = list(EpisodeType)
+_RESOURCE_TYPES = list(ExternalResourceType)
+
+# Offsets and sizes of sections following the header.
+_HEADER = struct.Struct("<8s18I")
+# ID, name.
+_ENTITY = struct.Struct("<16sI")
+# ID, title, synopsis, release date ordinal, date accuracy, series,
+# season, number, episode type, cover URI, then start and count of
+# writers, cast and external resources.
+_RECORD = struct.Struct("<16sIIIBiiiBIIHIHIH")
+# Actor, main, start and count of roles.
+_CAST = struct.Struct("<IBIH")
+# Resource type, link.
+_RESOURCE = struct.Struct("<BI")
+# ID, record number.
+_ID_ENTRY = struct.Struct("<16sI")
+_INT = struct.Struct("<I")
+
+
+class _Tables:
+    """Interned values of a catalog being written."""
+
+    def __init__(self):
+        self.strings: dict[str, int] = {}
+        self.persons: dict[UUID, int] = {}
+        self.person_rows = bytearray()
+        self.series: dict[UUID, int] = {}
+        self.series_rows = bytearray()
+        self.ints = bytearray()
+        self.cast = bytearray()
+        self.resources = bytearray()
+
+    def string(self, value: str | None) -> int:
+        """Interns string, returns its number."""
+        if value is None:
+            return _NONE
+        return self.strings.setdefault(value, len(self.strings))
+
+    def person(self, person: Person) -> int:
+        """Interns person, returns its number."""
+        num = self.persons.get(person.id)
+        if num is None:
+            num = self.persons[person.id] = len(self.persons)
+            self.person_rows += _ENTITY.pack(
+                person.id.bytes, self.string(person.name)
+            )
+        return num
+
+    def series_of(self, series: AudioPlaySeries | None) -> int:
+        """Interns series, returns its number or -1."""
+        if series is None:
+            return -1
+        num = self.series.get(series.id)
+        if num is None:
+            num = self.series[series.id] = len(self.series)
+            self.series_rows += _ENTITY.pack(
+                series.id.bytes, self.string(series.name)
+            )
+        return num
+
+    def int_list(self, values: list[int]) -> int:
+        """Appends list of numbers, returns its start."""
+        start = len(self.ints) // _INT.size
+        for value in values:
+            self.ints += _INT.pack(value)
+        return start
+
+    def record(self, audio_play: AudioPlay) -> bytes:
+        """Encodes audio play."""
+        writers = [self.person(w) for w in audio_play.writers]
+        cast_start = len(self.cast) // _CAST.size
+        for member in audio_play.cast:
+            roles = [self.string(r) for r in member.roles]
+            self.cast += _CAST.pack(
+                self.person(member.actor), member.main,
+                self.int_list(roles), len(roles)
+            )
+        resources_start = len(self.resources) // _RESOURCE.size
+        for resource in audio_play.external_resources:
+            self.resources += _RESOURCE.pack(
+                _RESOURCE_TYPES.index(resource.resource_type),
+                self.string(resource.link)
+            )
+        release_date = audio_play.release_date
+        return _RECORD.pack(
+            audio_play.id.bytes,
+            self.string(audio_play.title),
+            self.string(audio_play.synopsis),
+            release_date.date.toordinal(),
+            _ACCURACIES.index(release_date.accuracy),
+            self.series_of(audio_play.series),
+            _optional_int(audio_play.series_season),
+            _optional_int(audio_play.series_number),
+            0 if audio_play.episode_type is None
+            else _EPISODE_TYPES.index(audio_play.episode_type) + 1,
+            self.string(audio_play.cover_uri),
+            self.int_list(writers), len(writers),
+            cast_start, len(audio_play.cast),
+            resources_start, len(audio_play.external_resources),
+        )
+
+
+def _optional_int(value: int | None) -> int:
+    return _NONE_INT if value is None else value
+
+
+def _from_optional_int(value: int) -> int | None:
+    return None if value == _NONE_INT else value
+
+
+def write_compact_catalog(path: str, audio_plays: Iterable[AudioPlay]) -> int:
+    """
+    Writes audio plays in compact format. Persons, series and strings
+    are stored once and referenced by number, IDs are stored as bytes.
+    The file is replaced atomically.
+    :param path: path to file.
+    :param audio_plays: audio plays to write.
+    :return: number of written audio plays.
+    """
+    tables = _Tables()
+    records = bytearray()
+    ids = []
+    for audio_play in audio_plays:
+        ids.append((audio_play.id.bytes, len(ids)))
+        records += tables.record(audio_play)
+    ids.sort()
+
+    encoded = [s.encode() for s in tables.strings]
+    string_offsets = bytearray()
+    offset = 0
+    for data in encoded:
+        string_offsets += _INT.pack(offset)
+        offset += len(data)
+    string_offsets += _INT.pack(offset)
+
+    sections = (
+        string_offsets,
+        b"".join(encoded),
+        tables.person_rows,
+        tables.series_rows,
+        records,
+        tables.ints,
+        tables.cast,
+        tables.resources,
+        b"".join(_ID_ENTRY.pack(*entry) for entry in ids),
+    )
+    header = []
+    offset = _HEADER.size
+    for section in sections:
+        header += (offset, len(section))
+        offset += len(section)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, *header))
+        for section in sections:
+            f.write(section)
+    os.replace(temp_path, path)
+    return len(ids)
+
+
+class CompactAudioPlay:
+    """
+    Audio play read from compact catalog. Only the fixed-size record
+    is unpacked, strings, persons and lists are decoded when accessed.
+    """
+    __slots__ = ("_catalog", "_fields")
+
+    def __init__(self, catalog: "CompactCatalog", fields: tuple):
+        self._catalog = catalog
+        self._fields = fields
+
+    @property
+    def id(self) -> UUID:
+        return UUID(bytes=self._fields[0])
+
+    @property
+    def title(self) -> str:
+        return self._catalog.string(self._fields[1])
+
+    @property
+    def synopsis(self) -> str:
+        return self._catalog.string(self._fields[2])
+
+    @property
+    def release_date(self) -> ReleaseDate:
+        return ReleaseDate.model_construct(
+            date=date.fromordinal(self._fields[3]),
+            accuracy=_ACCURACIES[self._fields[4]],
+        )
+
+    @property
+    def writers(self) -> list[Person]:
+        start, count = self._fields[10:12]
+        return [
+            self._catalog.person(num)
+            for num in self._catalog.int_list(start, count)
+        ]
+
+    @property
+    def cast(self) -> list[CastMember]:
+        start, count = self._fields[12:14]
+        return self._catalog.cast(start, count)
+
+    @property
+    def series(self) -> AudioPlaySeries | None:
+        num = self._fields[5]
+        return None if num < 0 else self._catalog.series(num)
+
+    @property
+    def cover_uri(self) -> str | None:
+        return self._catalog.string(self._fields[9])
+
+    def to_model(self) -> AudioPlay:
+        """
+        Decodes all fields, skipping validation.
+        :return: audio play model.
+        """
+        episode_type = self._fields[8]
+        start, count = self._fields[14:16]
+        return AudioPlay.model_construct(
+            id=self.id,
+            title=self.title,
+            synopsis=self.synopsis,
+            release_date=self.release_date,
+            writers=self.writers,
+            cast=self.cast,
+            series=self.series,
+            series_season=_from_optional_int(self._fields[6]),
+            series_number=_from_optional_int(self._fields[7]),
+            episode_type=_EPISODE_TYPES[episode_type - 1]
+            if episode_type else None,
+            cover_uri=self.cover_uri,
+            external_resources=self._catalog.resources(start, count),
+        )
+
+
+class CompactCatalog:
+    """
+    Audio plays catalog read from memory-mapped compact file.
+    Decoded persons and series are cached, so audio plays decoded
+    from the same catalog share them.
+    """
+
+    def __init__(self, path: str):
+        """
+        Constructor.
+        :param path: path to file written by `write_compact_catalog`.
+        """
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, *header = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a compact catalog.")
+        (self._string_offsets, _,
+         self._strings, _,
+         self._persons, _,
+         self._series, _,
+         self._records, records_size,
+         self._ints, _,
+         self._cast, _,
+         self._resources, _,
+         self._ids, _) = header
+        self._size = records_size // _RECORD.size
+        self._person_cache: dict[int, Person] = {}
+        self._series_cache: dict[int, AudioPlaySeries] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, num: int) -> CompactAudioPlay:
+        if not 0 <= num < self._size:
+            raise IndexError(num)
+        fields = _RECORD.unpack_from(
+            self._mmap, self._records + num * _RECORD.size
+        )
+        return CompactAudioPlay(self, fields)
+
+    def __iter__(self) -> Iterator[CompactAudioPlay]:
+        for num in range(self._size):
+            yield self[num]
+
+    def get(self, audio_play_id: UUID) -> CompactAudioPlay | None:
+        """
+        Finds audio play by ID with binary search.
+        :param audio_play_id: ID of an audio play.
+        :return: audio play if found.
+        """
+        key = audio_play_id.bytes
+        lo = bisect.bisect_left(
+            range(self._size), key,
+            key=lambda i: self._mmap[
+                self._ids + i * _ID_ENTRY.size:
+                self._ids + i * _ID_ENTRY.size + 16
+            ]
+        )
+        if lo == self._size:
+            return None
+        found, num = _ID_ENTRY.unpack_from(
+            self._mmap, self._ids + lo * _ID_ENTRY.size
+        )
+        return self[num] if found == key else None
+
+    def string(self, num: int) -> str | None:
+        """Decodes string by its number."""
+        if num == _NONE:
+            return None
+        start, end = struct.unpack_from(
+            "<II", self._mmap, self._string_offsets + num * _INT.size
+        )
+        return str(self._mmap[self._strings + start:self._strings + end],
+                   "utf-8")
+
+    def person(self, num: int) -> Person:
+        """Decodes person by its number."""
+        person = self._person_cache.get(num)
+        if person is None:
+            id_bytes, name = _ENTITY.unpack_from(
+                self._mmap, self._persons + num * _ENTITY.size
+            )
+            person = self._person_cache[num] = Person.model_construct(
+                id=UUID(bytes=id_bytes), name=self.string(name)
+            )
+        return person
+
+    def series(self, num: int) -> AudioPlaySeries:
+        """Decodes series by its number."""
+        series = self._series_cache.get(num)
+        if series is None:
+            id_bytes, name = _ENTITY.unpack_from(
+                self._mmap, self._series + num * _ENTITY.size
+            )
+            series = AudioPlaySeries.model_construct(
+                id=UUID(bytes=id_bytes), name=self.string(name)
+            )
+            self._series_cache[num] = series
+        return series
+
+    def int_list(self, start: int, count: int) -> list[int]:
+        """Decodes list of numbers."""
+        offset = self._ints + start * _INT.size
+        return list(struct.unpack_from(f"<{count}I", self._mmap, offset))
+
+    def cast(self, start: int, count: int) -> list[CastMember]:
+        """Decodes cast members."""
+        members = []
+        for i in range(start, start + count):
+            actor, main, roles_start, roles_count = _CAST.unpack_from(
+                self._mmap, self._cast + i * _CAST.size
+            )
+            members.append(CastMember.model_construct(
+                actor=self.person(actor),
+                roles=[
+                    self.string(r)
+                    for r in self.int_list(roles_start, roles_count)
+                ],
+                main=bool(main),
+            ))
+        return members
+
+    def resources(self, start: int, count: int) -> list[ExternalResource]:
+        """Decodes external resources."""
+        resources = []
+        for i in range(start, start + count):
+            resource_type, link = _RESOURCE.unpack_from(
+                self._mmap, self._resources + i * _RESOURCE.size
+            )
+            resources.append(ExternalResource.model_construct(
+                resource_type=_RESOURCE_TYPES[resource_type],
+                link=self.string(link),
+            ))
+        return resources
+
+    def close(self) -> None:
+        """Unmaps file."""
+        self._mmap.close()
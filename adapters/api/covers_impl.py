@@ -0,0 +1,66 @@
+import logging
+import os
+import sqlite3
+
+from uuid import UUID
+
+from api.covers import CoverStore
+
+
+class SqliteCoverStore(CoverStore):
+    """
+    Cover store implementation via SQLite.
+    All entries are kept in memory, database is only read on
+    start and written to when new cover is put.
+    """
+
+    def __init__(self, path: str):
+        """
+        Constructor.
+        :param path: path to database file.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS covers ("
+            "audio_play_id TEXT NOT NULL, "
+            "cover_uri TEXT NOT NULL, "
+            "file_id TEXT NOT NULL, "
+            "PRIMARY KEY (audio_play_id, cover_uri))"
+        )
+        rows = self._connection.execute(
+            "SELECT audio_play_id, cover_uri, file_id FROM covers"
+        )
+        self._dict: dict[tuple[UUID, str], str] = {
+            (UUID(audio_play_id), cover_uri): file_id
+            for audio_play_id, cover_uri, file_id in rows
+        }
+        logging.info("Loaded %d cover IDs.", len(self._dict))
+
+    def get(self, audio_play_id: UUID, cover_uri: str) -> str | None:
+        return self._dict.get((audio_play_id, cover_uri))
+
+    def put(self, audio_play_id: UUID, cover_uri: str, file_id: str) -> None:
+        key = (audio_play_id, cover_uri)
+        if self._dict.get(key) == file_id:
+            return
+        self._dict[key] = file_id
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO covers VALUES (?, ?, ?)",
+                (str(audio_play_id), cover_uri, file_id)
+            )
+
+    def forget(self, audio_play_id: UUID) -> None:
+        keys = [k for k in self._dict if k[0] == audio_play_id]
+        if not keys:
+            return
+        for key in keys:
+            del self._dict[key]
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM covers WHERE audio_play_id = ?",
+                (str(audio_play_id),)
+            )
@@ -0,0 +1,24 @@
+import httpx
+
+_MAX_CONNECTIONS = 100
+_MAX_KEEPALIVE_CONNECTIONS = 20
+_KEEPALIVE_EXPIRY = 30.0
+_TIMEOUT = 10.0
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Creates pooled keep-alive HTTP client.
+    One client is meant to be shared by all services of the process,
+    so that connections to the API are reused between requests.
+    :return: async HTTP client.
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=_MAX_CONNECTIONS,
+            max_keepalive_connections=_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(_TIMEOUT),
+        follow_redirects=True,
+    )
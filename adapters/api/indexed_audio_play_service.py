@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from uuid import UUID
+
+from adapters.logs import Event
+from adapters.search_index import SearchIndex
+from api.audio_play_service import AudioPlayService
+from api.model.audio_play import AudioPlay, AudioPlayLocation, \
+    ListAudioPlaysResponse, SearchAudioPlaysResponse
+from api.model.error_response import ErrorResponse
+
+
+class IndexedAudioPlayService(AudioPlayService):
+    """
+    Audio play service answering searches from local index.
+
+    Every audio play got from another service is added to the index.
+    Once the index holds the whole catalog, which is then kept up to
+    date by catalog sync, searches and audio plays by ID are answered
+    locally. Until then they are made remotely, and local results are
+    returned only if remote search is slower than allowed. The remote
+    search still completes in background then, so its results are
+    indexed.
+    """
+
+    def __init__(
+            self,
+            aps: AudioPlayService,
+            index: SearchIndex,
+            slow_after: float = 1.0
+    ):
+        """
+        Constructor.
+        :param aps: service to make calls to.
+        :param index: index to fill and search.
+        :param slow_after: time in seconds to wait for remote search
+        before answering from index.
+        """
+        self._aps = aps
+        self._index = index
+        self._slow_after = slow_after
+
+    async def get(
+            self,
+            audio_play_id: UUID
+    ) -> AudioPlay | ErrorResponse | None:
+        if self._index.complete:
+            found = self._index.get(audio_play_id)
+            if found is not None:
+                return found
+        response = await self._aps.get(audio_play_id)
+        if isinstance(response, AudioPlay):
+            self._index.add(response)
+        return response
+
+    async def search(
+            self,
+            query: str,
+            limit: int | None = None
+    ) -> SearchAudioPlaysResponse | ErrorResponse | None:
+        if self._index.complete:
+            return self._search_locally(query, limit)
+
+        task = asyncio.create_task(self._search_remotely(query, limit))
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(task), self._slow_after
+            )
+        except TimeoutError:
+            local = self._search_locally(query, limit)
+            if not local.audio_plays:
+                return await task
+            logging.info(Event("slow_search", query=query))
+            return local
+
+    async def list(
+            self,
+            page_size: int,
+            page_token: str | None = None,
+            sync_token: str | None = None
+    ) -> ListAudioPlaysResponse | ErrorResponse | None:
+        return await self._aps.list(page_size, page_token, sync_token)
+
+    async def get_location(
+            self,
+            token: str,
+            audio_play_id: UUID
+    ) -> AudioPlayLocation | ErrorResponse | None:
+        return await self._aps.get_location(token, audio_play_id)
+
+    async def get_cover(self, cover_uri: str) -> bytes | None:
+        return await self._aps.get_cover(cover_uri)
+
+    async def _search_remotely(
+            self,
+            query: str,
+            limit: int | None
+    ) -> SearchAudioPlaysResponse | ErrorResponse | None:
+        """
+        Searches audio plays remotely and indexes results.
+        :param query: query string.
+        :param limit: max number of results.
+        :return: response of the remote service.
+        """
+        response = await self._aps.search(query, limit)
+        if isinstance(response, SearchAudioPlaysResponse):
+            self._index.add_all(response.audio_plays)
+        return response
+
+    def _search_locally(
+            self,
+            query: str,
+            limit: int | None
+    ) -> SearchAudioPlaysResponse:
+        """
+        Searches audio plays in index.
+        :param query: query string.
+        :param limit: max number of results.
+        :return: found audio plays.
+        """
+        return SearchAudioPlaysResponse(
+            audio_plays=self._index.search(query, limit)
+        )
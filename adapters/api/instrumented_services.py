@@ -0,0 +1,152 @@
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+from uuid import UUID
+
+from adapters.metrics import Family, Histogram
+from api.audio_play_service import AudioPlayService
+from api.authentication_service import AuthenticationService
+from api.model.audio_play import AudioPlay, AudioPlayLocation, \
+    ListAudioPlaysResponse, SearchAudioPlaysResponse
+from api.model.authentication import AuthenticateUserRequest, \
+    AuthenticateUserResponse, CreateUserRequest
+from api.model.error_response import ErrorResponse
+
+T = TypeVar("T")
+
+_OK = "ok"
+_UNAVAILABLE = "unavailable"
+_EXCEPTION = "exception"
+
+
+def _status(response: Any) -> str:
+    """
+    Gets status label of service response.
+    :param response: response of service.
+    :return: "ok", name of error status, or "unavailable" if service
+    couldn't be reached.
+    """
+    if response is None:
+        return _UNAVAILABLE
+    if isinstance(response, ErrorResponse):
+        return response.status.name
+    return _OK
+
+
+async def _timed(
+        latency: Family[Histogram],
+        service: str,
+        endpoint: str,
+        call: Callable[[], Awaitable[T]]
+) -> T:
+    """
+    Makes call and records its latency by endpoint and status.
+    :param latency: histograms labelled by service, endpoint and status.
+    :param service: service name.
+    :param endpoint: endpoint name.
+    :param call: makes call.
+    :return: result of call.
+    """
+    start = time.perf_counter()
+    status = _EXCEPTION
+    try:
+        response = await call()
+        status = _status(response)
+        return response
+    finally:
+        latency.labels(service, endpoint, status).observe(
+            time.perf_counter() - start
+        )
+
+
+class InstrumentedAudioPlayService(AudioPlayService):
+    """Audio play service recording latency of another one."""
+
+    def __init__(self, aps: AudioPlayService, latency: Family[Histogram]):
+        """
+        Constructor.
+        :param aps: service to measure.
+        :param latency: histograms labelled by service, endpoint and status.
+        """
+        self._aps = aps
+        self._latency = latency
+
+    async def get(
+            self,
+            audio_play_id: UUID
+    ) -> AudioPlay | ErrorResponse | None:
+        return await _timed(
+            self._latency, "audio_plays", "get",
+            lambda: self._aps.get(audio_play_id)
+        )
+
+    async def search(
+            self,
+            query: str,
+            limit: int | None = None
+    ) -> SearchAudioPlaysResponse | ErrorResponse | None:
+        return await _timed(
+            self._latency, "audio_plays", "search",
+            lambda: self._aps.search(query, limit)
+        )
+
+    async def list(
+            self,
+            page_size: int,
+            page_token: str | None = None,
+            sync_token: str | None = None
+    ) -> ListAudioPlaysResponse | ErrorResponse | None:
+        return await _timed(
+            self._latency, "audio_plays", "list",
+            lambda: self._aps.list(page_size, page_token, sync_token)
+        )
+
+    async def get_location(
+            self,
+            token: str,
+            audio_play_id: UUID
+    ) -> AudioPlayLocation | ErrorResponse | None:
+        return await _timed(
+            self._latency, "audio_plays", "get_location",
+            lambda: self._aps.get_location(token, audio_play_id)
+        )
+
+    async def get_cover(self, cover_uri: str) -> bytes | None:
+        return await _timed(
+            self._latency, "audio_plays", "get_cover",
+            lambda: self._aps.get_cover(cover_uri)
+        )
+
+
+class InstrumentedAuthenticationService(AuthenticationService):
+    """Authentication service recording latency of another one."""
+
+    def __init__(
+            self,
+            aus: AuthenticationService,
+            latency: Family[Histogram]
+    ):
+        """
+        Constructor.
+        :param aus: service to measure.
+        :param latency: histograms labelled by service, endpoint and status.
+        """
+        self._aus = aus
+        self._latency = latency
+
+    async def login(
+            self,
+            request: AuthenticateUserRequest
+    ) -> AuthenticateUserResponse | ErrorResponse | None:
+        return await _timed(
+            self._latency, "authentication", "login",
+            lambda: self._aus.login(request)
+        )
+
+    async def register(
+            self,
+            request: CreateUserRequest
+    ) -> AuthenticateUserResponse | ErrorResponse | None:
+        return await _timed(
+            self._latency, "authentication", "register",
+            lambda: self._aus.register(request)
+        )
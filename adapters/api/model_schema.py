@@ -0,0 +1,18 @@
+import functools
+import hashlib
+import json
+
+from pydantic import BaseModel
+
+
+@functools.cache
+def schema_version(model: type[BaseModel]) -> str:
+    """
+    Gets version of model schema, which changes whenever the model or
+    any model nested in it changes, so that data stored by an older
+    version of code can be told apart.
+    :param model: model type.
+    :return: short hash of model JSON schema.
+    """
+    schema = json.dumps(model.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()[:16]
@@ -0,0 +1,117 @@
+import logging
+import time
+
+import redis
+import redis.asyncio
+
+from adapters.api.tokens_impl import token_expiry
+from api.tokens import RenewableToken, TokenStore
+
+_KEY_PREFIX = "dwtr:token:"
+_ID_KEY_PREFIX = "dwtr:id_token:"
+_LEASE_KEY_PREFIX = "dwtr:renewal:"
+
+
+def _decode(value: bytes | str) -> str:
+    """
+    Decodes value returned by server.
+    :param value: value as bytes, or as string if client decodes them.
+    :return: string value.
+    """
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisTokenStore(TokenStore):
+    """
+    Token store implementation via Redis or any server speaking its
+    protocol. Keys expire together with tokens they hold, ID tokens
+    are kept under separate keys expiring with access tokens.
+    Renewal of a token is claimed by setting a key unless it exists.
+    """
+
+    def __init__(self, client: redis.asyncio.Redis):
+        """
+        Constructor.
+        :param client: async client to connect to server with.
+        """
+        self._client = client
+
+    async def get(self, user_id: int) -> str | None:
+        try:
+            token = await self._client.get(_KEY_PREFIX + str(user_id))
+        except redis.RedisError:
+            logging.exception("Error while getting token.")
+            return None
+        return _decode(token) if token is not None else None
+
+    async def put(
+            self,
+            user_id: int,
+            token: str,
+            id_token: str | None = None
+    ) -> None:
+        exp = token_expiry(token)
+        if exp is None:
+            await self._delete(user_id)
+            return
+        try:
+            async with self._client.pipeline(transaction=True) as pipe:
+                pipe.set(_KEY_PREFIX + str(user_id), token, exat=int(exp))
+                if id_token:
+                    pipe.set(
+                        _ID_KEY_PREFIX + str(user_id),
+                        id_token,
+                        exat=int(exp)
+                    )
+                else:
+                    pipe.delete(_ID_KEY_PREFIX + str(user_id))
+                await pipe.execute()
+        except redis.RedisError:
+            logging.exception("Error while putting token.")
+
+    async def renewable(self) -> list[RenewableToken]:
+        try:
+            id_keys = [
+                _decode(key) async for key in
+                self._client.scan_iter(match=_ID_KEY_PREFIX + "*")
+            ]
+            if not id_keys:
+                return []
+            user_ids = [int(key[len(_ID_KEY_PREFIX):]) for key in id_keys]
+            id_tokens = await self._client.mget(id_keys)
+            tokens = await self._client.mget(
+                [_KEY_PREFIX + str(user_id) for user_id in user_ids]
+            )
+        except redis.RedisError:
+            logging.exception("Error while listing tokens.")
+            return []
+        return [
+            RenewableToken(user_id, _decode(token), _decode(id_token))
+            for user_id, token, id_token in zip(user_ids, tokens, id_tokens)
+            if token is not None and id_token is not None
+        ]
+
+    async def lease(self, user_id: int, exp: float) -> bool:
+        key = f"{_LEASE_KEY_PREFIX}{user_id}:{int(exp)}"
+        ttl = max(1, int((exp - time.time()) * 1000))
+        try:
+            return bool(await self._client.set(key, 1, nx=True, px=ttl))
+        except redis.RedisError:
+            # Renewing twice is better than not renewing.
+            logging.exception("Error while claiming token renewal.")
+            return True
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    async def _delete(self, user_id: int) -> None:
+        """
+        Deletes token of user along with ID token.
+        :param user_id: user ID.
+        """
+        try:
+            await self._client.delete(
+                _KEY_PREFIX + str(user_id), _ID_KEY_PREFIX + str(user_id)
+            )
+        except redis.RedisError:
+            logging.exception("Error while deleting token.")
@@ -0,0 +1,400 @@
+import asyncio
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, TypeVar
+
+from pydantic import BaseModel
+
+from adapters.api.model_schema import schema_version
+
+M = TypeVar("M", bound=BaseModel)
+
+
+@dataclass
+class CacheStats:
+    """
+    Cache counters of one namespace.
+    :param hits: lookups served from cache.
+    :param disk_hits: part of hits served from disk.
+    :param stale_hits: part of hits served after expiration.
+    :param misses: lookups not found in cache.
+    :param evictions: entries evicted from memory because of size limit.
+    """
+    hits: int = 0
+    disk_hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class _Entry:
+    """
+    In-memory cache entry.
+    :param value: parsed model.
+    :param expires_at: UNIX timestamp entry is valid until.
+    :param size: size of pickled model in bytes.
+    """
+    value: BaseModel
+    expires_at: float
+    size: int
+
+
+def _unpickle(data: bytes, model: type[M]) -> M | None:
+    """
+    Restores pickled model.
+    :param data: pickled model.
+    :param model: expected type of model.
+    :return: model, or None if data doesn't hold model of given type.
+    """
+    try:
+        value = pickle.loads(data)
+    except Exception:
+        logging.warning("Cached response is unreadable.")
+        return None
+    return value if isinstance(value, model) else None
+
+
+class ResponseCache:
+    """
+    Two-tier cache of parsed API responses.
+    Models are kept in an in-memory LRU bounded by their pickled
+    size, backed by SQLite database bounded the same way. Expired and
+    excess entries are removed from the database in background.
+    Expired entries can be kept for a while to be served stale.
+
+    Models are pickled rather than serialized to JSON, so that reading
+    them from the database costs neither parsing nor validation. Every
+    entry is stored along with schema version of its model, entries
+    stored by other versions of code are ignored.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            max_memory_bytes: int = 64 * 1024 * 1024,
+            max_disk_bytes: int = 512 * 1024 * 1024,
+            eviction_interval: float = 60.0,
+            max_stale: float = 0.0
+    ):
+        """
+        Constructor.
+        :param path: path to database file.
+        :param max_memory_bytes: max size of in-memory entries.
+        :param max_disk_bytes: max size of entries in database.
+        :param eviction_interval: interval in seconds between
+        background evictions.
+        :param max_stale: time in seconds expired entries
+        are kept to be served stale.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "namespace TEXT NOT NULL, "
+            "key TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, "
+            "data BLOB NOT NULL, "
+            "schema TEXT NOT NULL DEFAULT '', "
+            "PRIMARY KEY (namespace, key))"
+        )
+        columns = {
+            row[1] for row in
+            self._connection.execute("PRAGMA table_info(responses)")
+        }
+        if "schema" not in columns:
+            # Database created before schema versions were stored,
+            # its entries never match any version.
+            self._connection.execute(
+                "ALTER TABLE responses "
+                "ADD COLUMN schema TEXT NOT NULL DEFAULT ''"
+            )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_expires_at "
+            "ON responses (expires_at)"
+        )
+        self._db_lock = threading.Lock()
+        self._memory: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._memory_bytes = 0
+        self._max_memory_bytes = max_memory_bytes
+        self._max_disk_bytes = max_disk_bytes
+        self._eviction_interval = eviction_interval
+        self._max_stale = max_stale
+        self._eviction_task: asyncio.Task | None = None
+        self._stats: dict[str, CacheStats] = {}
+
+    @property
+    def stats(self) -> dict[str, CacheStats]:
+        """Counters by namespace."""
+        return self._stats
+
+    @property
+    def memory_bytes(self) -> int:
+        """Size of in-memory entries."""
+        return self._memory_bytes
+
+    async def get(
+            self,
+            namespace: str,
+            key: str,
+            model: type[M]
+    ) -> M | None:
+        """
+        Gets cached model.
+        :param namespace: namespace, e.g. endpoint name.
+        :param key: key within namespace.
+        :param model: type of cached model.
+        :return: model if found and not expired, otherwise None.
+        """
+        found = await self.lookup(namespace, key, model)
+        if found is None:
+            return None
+        value, fresh = found
+        return value if fresh else None
+
+    async def lookup(
+            self,
+            namespace: str,
+            key: str,
+            model: type[M]
+    ) -> tuple[M, bool] | None:
+        """
+        Gets cached model, including expired one that is kept stale.
+        :param namespace: namespace, e.g. endpoint name.
+        :param key: key within namespace.
+        :param model: type of cached model.
+        :return: model and whether it's not expired,
+        or None if not found.
+        """
+        self._ensure_eviction()
+        stats = self._stats_of(namespace)
+        now = time.time()
+        entry = self._memory.get((namespace, key))
+        if entry is not None:
+            if now < entry.expires_at + self._max_stale:
+                self._memory.move_to_end((namespace, key))
+                return self._hit(stats, entry, now)
+            self._forget((namespace, key))
+
+        row = await asyncio.to_thread(
+            self._select,
+            namespace,
+            key,
+            now - self._max_stale,
+            schema_version(model)
+        )
+        if row is None:
+            stats.misses += 1
+            return None
+
+        expires_at, data = row
+        value = _unpickle(data, model)
+        if value is None:
+            stats.misses += 1
+            return None
+        entry = _Entry(value, expires_at, len(data))
+        self._remember((namespace, key), entry)
+        stats.disk_hits += 1
+        return self._hit(stats, entry, now)
+
+    async def put(
+            self,
+            namespace: str,
+            key: str,
+            value: BaseModel,
+            ttl: float
+    ) -> None:
+        """
+        Puts model in cache.
+        :param namespace: namespace, e.g. endpoint name.
+        :param key: key within namespace.
+        :param value: model to cache.
+        :param ttl: time to live in seconds.
+        """
+        await self.put_many(namespace, ((key, value),), ttl)
+
+    async def put_many(
+            self,
+            namespace: str,
+            items: Iterable[tuple[str, BaseModel]],
+            ttl: float
+    ) -> None:
+        """
+        Puts several models in cache at once.
+        :param namespace: namespace, e.g. endpoint name.
+        :param items: keys within namespace and models to cache.
+        :param ttl: time to live in seconds.
+        """
+        self._ensure_eviction()
+        expires_at = time.time() + ttl
+        rows = []
+        for key, value in items:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            entry = _Entry(value, expires_at, len(data))
+            self._remember((namespace, key), entry)
+            rows.append((
+                namespace, key, expires_at, data,
+                schema_version(type(value))
+            ))
+        await asyncio.to_thread(self._insert, rows)
+
+    async def close(self) -> None:
+        """Stops background eviction and closes database."""
+        if self._eviction_task:
+            self._eviction_task.cancel()
+            self._eviction_task = None
+        with self._db_lock:
+            self._connection.close()
+
+    @staticmethod
+    def _hit(
+            stats: CacheStats,
+            entry: _Entry,
+            now: float
+    ) -> tuple[BaseModel, bool]:
+        """
+        Counts hit.
+        :param stats: counters to update.
+        :param entry: found entry.
+        :param now: current time as UNIX timestamp.
+        :return: model and whether it's not expired.
+        """
+        fresh = now < entry.expires_at
+        stats.hits += 1
+        if not fresh:
+            stats.stale_hits += 1
+        return entry.value, fresh
+
+    def _stats_of(self, namespace: str) -> CacheStats:
+        """
+        Gets counters of namespace.
+        :param namespace: namespace.
+        :return: counters.
+        """
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = self._stats[namespace] = CacheStats()
+        return stats
+
+    def _remember(self, key: tuple[str, str], entry: _Entry) -> None:
+        """
+        Puts entry in memory, evicting least recently used ones
+        until entries fit in memory limit.
+        :param key: namespace and key.
+        :param entry: entry to put.
+        """
+        self._forget(key)
+        self._memory[key] = entry
+        self._memory_bytes += entry.size
+        while self._memory_bytes > self._max_memory_bytes \
+                and len(self._memory) > 1:
+            evicted_key, _ = next(iter(self._memory.items()))
+            self._forget(evicted_key)
+            self._stats_of(evicted_key[0]).evictions += 1
+
+    def _forget(self, key: tuple[str, str]) -> None:
+        """
+        Removes entry from memory.
+        :param key: namespace and key.
+        """
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry.size
+
+    def _ensure_eviction(self) -> None:
+        """Starts background eviction if it's not running."""
+        if self._eviction_task is None or self._eviction_task.done():
+            self._eviction_task = asyncio.create_task(self._evict_loop())
+
+    async def _evict_loop(self) -> None:
+        """Periodically removes expired and excess entries."""
+        while True:
+            await asyncio.sleep(self._eviction_interval)
+            deadline = time.time() - self._max_stale
+            for key in [k for k, e in self._memory.items()
+                        if e.expires_at <= deadline]:
+                self._forget(key)
+            try:
+                await asyncio.to_thread(self._evict_disk, deadline)
+            except sqlite3.Error:
+                logging.exception("Error while evicting cached responses.")
+
+    def _select(
+            self,
+            namespace: str,
+            key: str,
+            deadline: float,
+            schema: str
+    ) -> tuple[float, bytes] | None:
+        """
+        Reads entry from database.
+        :param namespace: namespace.
+        :param key: key within namespace.
+        :param deadline: UNIX timestamp entries expired before are ignored.
+        :param schema: schema version of expected model.
+        :return: expiration time and pickled model if found.
+        """
+        with self._db_lock:
+            return self._connection.execute(
+                "SELECT expires_at, data FROM responses "
+                "WHERE namespace = ? AND key = ? AND expires_at > ? "
+                "AND schema = ?",
+                (namespace, key, deadline, schema)
+            ).fetchone()
+
+    def _insert(
+            self,
+            rows: list[tuple[str, str, float, bytes, str]]
+    ) -> None:
+        """
+        Writes entries to database.
+        :param rows: namespace, key, expiration time, pickled model
+        and its schema version of each entry.
+        """
+        with self._db_lock, self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO responses "
+                "(namespace, key, expires_at, data, schema) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def _evict_disk(self, deadline: float) -> None:
+        """
+        Removes expired entries from database, then entries
+        closest to expiration until database fits in size limit.
+        :param deadline: UNIX timestamp entries expired before are removed.
+        """
+        with self._db_lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (deadline,)
+            )
+            (total,) = self._connection.execute(
+                "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM responses"
+            ).fetchone()
+            excess = total - self._max_disk_bytes
+            if excess <= 0:
+                return
+            rows = self._connection.execute(
+                "SELECT namespace, key, LENGTH(data) FROM responses "
+                "ORDER BY expires_at"
+            )
+            doomed = []
+            for namespace, key, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((namespace, key))
+                excess -= size
+            self._connection.executemany(
+                "DELETE FROM responses WHERE namespace = ? AND key = ?",
+                doomed
+            )
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from adapters.api.tokens_impl import token_expiry
+from api.tokens import RenewableToken, TokenStore
+
+
+class SqliteTokenStore(TokenStore):
+    """
+    Token store implementation via SQLite in WAL mode.
+    Puts are buffered and written in batches by a background thread,
+    expired tokens are deleted along with every batch. Reads use their
+    own connection in worker threads, so they wait neither for writes
+    nor block the event loop.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            flush_interval: float = 1.0,
+            batch_size: int = 100
+    ):
+        """
+        Constructor.
+        :param path: path to database file.
+        :param flush_interval: max time in seconds put waits to be written.
+        :param batch_size: number of buffered puts that triggers write.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS tokens ("
+            "user_id INTEGER PRIMARY KEY, "
+            "token TEXT NOT NULL, "
+            "exp REAL NOT NULL, "
+            "id_token TEXT)"
+        )
+        columns = {
+            row[1] for row in
+            self._connection.execute("PRAGMA table_info(tokens)")
+        }
+        if "id_token" not in columns:
+            # Database created before ID tokens were stored.
+            self._connection.execute(
+                "ALTER TABLE tokens ADD COLUMN id_token TEXT"
+            )
+        self._connection.commit()
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._read_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # User ID -> access token, its expiration time and ID token.
+        self._pending: dict[int, tuple[str, float, str | None]] = {}
+        # Batch being written, still visible to reads until committed.
+        self._writing: dict[int, tuple[str, float, str | None]] = {}
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop,
+            name="sqlite-token-writer",
+            daemon=True
+        )
+        self._writer.start()
+
+    async def get(self, user_id: int) -> str | None:
+        now = time.time()
+        with self._lock:
+            buffered = self._pending.get(user_id) \
+                or self._writing.get(user_id)
+        if buffered is not None:
+            token, exp, _ = buffered
+            return token if now < exp else None
+        return await asyncio.to_thread(self._select, user_id, now)
+
+    async def put(
+            self,
+            user_id: int,
+            token: str,
+            id_token: str | None = None
+    ) -> None:
+        exp = token_expiry(token)
+        if exp is None:
+            # Stored token is replaced with an expired one,
+            # which is deleted when written.
+            exp = 0.0
+        with self._lock:
+            self._pending[user_id] = (token, exp, id_token)
+            full = len(self._pending) >= self._batch_size
+        if full:
+            self._wakeup.set()
+
+    async def renewable(self) -> list[RenewableToken]:
+        now = time.time()
+        with self._lock:
+            buffered = self._writing | self._pending
+        rows = await asyncio.to_thread(self._select_renewable, now)
+        tokens = {
+            user_id: RenewableToken(user_id, token, id_token)
+            for user_id, token, id_token in rows
+        }
+        for user_id, (token, exp, id_token) in buffered.items():
+            if id_token and now < exp:
+                tokens[user_id] = RenewableToken(user_id, token, id_token)
+            else:
+                tokens.pop(user_id, None)
+        return list(tokens.values())
+
+    async def close(self) -> None:
+        """Writes buffered tokens and closes database."""
+        await asyncio.to_thread(self._close)
+
+    def _close(self) -> None:
+        """Writes buffered tokens and closes database, blocking."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._writer.join()
+        self._connection.close()
+        with self._read_lock:
+            self._reader.close()
+
+    def _select(self, user_id: int, now: float) -> str | None:
+        """
+        Reads token from database.
+        :param user_id: user ID.
+        :param now: current time as UNIX timestamp.
+        :return: token if found and not expired.
+        """
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT token FROM tokens WHERE user_id = ? AND exp > ?",
+                (user_id, now)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _select_renewable(self, now: float) -> list[tuple[int, str, str]]:
+        """
+        Reads tokens stored along with ID tokens from database.
+        :param now: current time as UNIX timestamp.
+        :return: user IDs, access tokens and ID tokens.
+        """
+        with self._read_lock:
+            return self._reader.execute(
+                "SELECT user_id, token, id_token FROM tokens "
+                "WHERE exp > ? AND id_token IS NOT NULL",
+                (now,)
+            ).fetchall()
+
+    def _write_loop(self) -> None:
+        """Writes buffered tokens until store is closed."""
+        while not self._closed:
+            self._wakeup.wait(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                self._flush()
+            except sqlite3.Error:
+                logging.exception("Error while writing tokens.")
+        self._flush()
+
+    def _flush(self) -> None:
+        """Writes buffered tokens in one transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            self._writing, self._pending = self._pending, {}
+        batch = [
+            (user_id, token, exp, id_token)
+            for user_id, (token, exp, id_token) in self._writing.items()
+        ]
+        try:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO tokens "
+                    "(user_id, token, exp, id_token) VALUES (?, ?, ?, ?)",
+                    batch
+                )
+                self._connection.execute(
+                    "DELETE FROM tokens WHERE exp <= ?", (time.time(),)
+                )
+        except sqlite3.Error:
+            # Put batch back unless newer tokens were put meanwhile.
+            with self._lock:
+                self._pending = self._writing | self._pending
+                self._writing = {}
+            raise
+        with self._lock:
+            self._writing = {}
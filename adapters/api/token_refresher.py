@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import random
+import time
+
+from adapters.api.tokens_impl import token_expiry
+from adapters.logs import Event
+from adapters.metrics import Histogram
+from api.authentication_service import AuthenticationService
+from api.model.authentication import AuthenticateUserResponse, \
+    IdTokenAuthentication
+from api.tokens import RenewableToken, TokenStore
+
+_MIN_DELAY = 30.0
+_MAX_STALE_RENEWALS = 3
+
+
+class TokenRefresher(TokenStore):
+    """
+    Token store renewing access tokens of logged-in users before they
+    expire. Every token put along with an ID token is renewed with it,
+    tokens already stored are picked up on start.
+
+    Renewal of every token is scheduled some margin before its
+    expiration, but never sooner than halfway to expiration, so
+    short-lived tokens are not renewed in a loop. A random jitter is
+    added after that, so that tokens issued or loaded at the same time
+    are not renewed all at once. Renewal of a user stops if it brings
+    no token living longer than the previous one several times in a
+    row.
+
+    Before renewing, the token is claimed in the store, so that only
+    one of processes sharing it renews the token. Other processes stop
+    tracking the user, the one that renewed keeps doing it.
+    """
+
+    def __init__(
+            self,
+            aus: AuthenticationService,
+            ts: TokenStore,
+            margin: float = 300.0,
+            jitter: float = 60.0
+    ):
+        """
+        Constructor.
+        :param aus: authentication service to renew tokens with.
+        :param ts: token store to keep tokens in.
+        :param margin: time in seconds before expiration to renew at.
+        :param jitter: max random time in seconds renewal is delayed by.
+        """
+        self._aus = aus
+        self._ts = ts
+        self._margin = margin
+        self._jitter = jitter
+        self._timers: dict[int, asyncio.TimerHandle] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._stale: dict[int, int] = {}
+        # User ID -> expiration time of the token claimed for renewal.
+        self._leased: dict[int, float] = {}
+        self._latency = Histogram()
+        self.refreshed = 0
+        self.failed = 0
+        self.abandoned = 0
+
+    @property
+    def latency(self) -> Histogram:
+        """Durations of renewal requests in seconds."""
+        return self._latency
+
+    @property
+    def scheduled(self) -> int:
+        """Number of users whose renewal is scheduled."""
+        return len(self._timers)
+
+    async def get(self, user_id: int) -> str | None:
+        return await self._ts.get(user_id)
+
+    async def put(
+            self,
+            user_id: int,
+            token: str,
+            id_token: str | None = None
+    ) -> None:
+        await self._ts.put(user_id, token, id_token)
+        self._stale.pop(user_id, None)
+        self._leased.pop(user_id, None)
+        if id_token:
+            self._track(user_id, token, id_token)
+        else:
+            self.cancel(user_id)
+
+    async def renewable(self) -> list[RenewableToken]:
+        return await self._ts.renewable()
+
+    async def lease(self, user_id: int, exp: float) -> bool:
+        return await self._ts.lease(user_id, exp)
+
+    async def start(self) -> None:
+        """Schedules renewal of tokens already stored."""
+        tokens = await self._ts.renewable()
+        for token in tokens:
+            self._track(token.user_id, token.access_token, token.id_token)
+        logging.info(Event("tokens_tracked", count=len(tokens)))
+
+    async def close(self) -> None:
+        """Cancels renewals and closes underlying store."""
+        for user_id in list(self._timers):
+            self.cancel(user_id)
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        # Renewals must not put tokens into closed store.
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._ts.close()
+
+    def cancel(self, user_id: int) -> None:
+        """
+        Cancels scheduled renewal of user tokens.
+        :param user_id: user ID.
+        """
+        timer = self._timers.pop(user_id, None)
+        if timer:
+            timer.cancel()
+
+    def _track(self, user_id: int, token: str, id_token: str) -> None:
+        """
+        Schedules renewal of user tokens.
+        Replaces previously scheduled renewal of this user.
+        :param user_id: user ID.
+        :param token: access token to renew.
+        :param id_token: ID token to renew with.
+        """
+        exp = token_expiry(token)
+        if exp is None:
+            return
+        remaining = exp - time.time()
+        delay = max(
+            remaining - self._margin - self._jitter,
+            remaining / 2,
+            _MIN_DELAY
+        )
+        # Jitter takes at most half of the time left after that,
+        # so that it doesn't push renewal too close to expiration.
+        slack = max(0.0, (remaining - delay) / 2)
+        delay += random.uniform(0, min(self._jitter, slack))
+        self._schedule(user_id, id_token, exp, delay)
+
+    def _schedule(
+            self,
+            user_id: int,
+            id_token: str,
+            exp: float,
+            delay: float
+    ) -> None:
+        """
+        Schedules renewal.
+        :param user_id: user ID.
+        :param id_token: ID token to renew with.
+        :param exp: expiration time of current access token.
+        :param delay: delay in seconds.
+        """
+        self.cancel(user_id)
+        loop = asyncio.get_running_loop()
+        self._timers[user_id] = loop.call_later(
+            delay, self._start_refresh, user_id, id_token, exp
+        )
+
+    def _start_refresh(self, user_id: int, id_token: str, exp: float) -> None:
+        """
+        Starts renewal task.
+        :param user_id: user ID.
+        :param id_token: ID token to renew with.
+        :param exp: expiration time of current access token.
+        """
+        self._timers.pop(user_id, None)
+        task = asyncio.create_task(self._refresh(user_id, id_token, exp))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, user_id: int, id_token: str, exp: float) -> None:
+        """
+        Renews tokens. If renewal fails, it is retried once
+        halfway to expiration if there is time left.
+        :param user_id: user ID.
+        :param id_token: ID token to renew with.
+        :param exp: expiration time of current access token.
+        """
+        if self._leased.get(user_id) != exp:
+            if not await self._ts.lease(user_id, exp):
+                logging.info(Event("token_renewal_claimed", user=user_id))
+                return
+            self._leased[user_id] = exp
+
+        start = time.perf_counter()
+        response = await self._aus.login(IdTokenAuthentication(
+            id_token=id_token
+        ))
+        latency = time.perf_counter() - start
+        self._latency.observe(latency)
+
+        if isinstance(response, AuthenticateUserResponse):
+            self.refreshed += 1
+            stale = self._stale.get(user_id, 0)
+            new_exp = token_expiry(response.access_token)
+            stale = stale + 1 if new_exp is None or new_exp <= exp else 0
+            await self.put(
+                user_id, response.access_token, response.id_token
+            )
+            if stale >= _MAX_STALE_RENEWALS:
+                # Server keeps returning tokens that don't live longer.
+                self.cancel(user_id)
+                self.abandoned += 1
+                logging.warning(Event("token_renewal_stopped", user=user_id))
+            elif stale:
+                self._stale[user_id] = stale
+            logging.info(Event("token_renewed", user=user_id, took=latency))
+            return
+
+        self.failed += 1
+        remaining = exp - time.time()
+        logging.warning(Event(
+            "token_renewal_failed", user=user_id, remaining=remaining
+        ))
+        if remaining / 2 >= _MIN_DELAY and user_id not in self._timers:
+            self._schedule(user_id, id_token, exp, remaining / 2)
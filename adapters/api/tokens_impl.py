@@ -1,40 +1,193 @@
+import heapq
 import logging
+import time
+from collections import OrderedDict
+from typing import NamedTuple
 
-from api.tokens import TokenStore
+from api.tokens import RenewableToken, TokenStore
 
 import jwt
-from datetime import datetime, timezone
 
+_PURGE_INTERVAL = 60.0
 
-def _is_expired(token: str) -> bool:
+
+def token_expiry(token: str) -> float | None:
     """
-    Checks token expiration.
+    Gets token expiration time.
     :param token: JWT token to check.
-    :return: `True` if expired.
+    :return: expiration time as UNIX timestamp, None if token
+    is invalid or never expires.
     """
     try:
         payload = jwt.decode(token, options={"verify_signature": False})
         exp = payload.get("exp")
-        if exp is not None:
-            return datetime.now(timezone.utc).timestamp() >= exp
-        return True
+        return float(exp) if exp is not None else None
     except jwt.DecodeError:
-        logging.error("Invalid token was stored.")
-        return True
+        logging.error("Received invalid token.")
+        return None
+
+
+class _TokenRecord(NamedTuple):
+    """
+    Stored token.
+    :param token: access token.
+    :param exp: expiration time as UNIX timestamp.
+    :param id_token: ID token to renew access token with.
+    """
+    token: str
+    exp: float
+    id_token: str | None = None
 
 
 class DictTokenStore(TokenStore):
-    """Token store implementation via dict."""
+    """
+    Token store implementation via dict.
+    Tokens are parsed once when put, expired ones are
+    removed in bulk once in a while.
+    """
 
-    def __init__(self):
-        """Constructor."""
-        self._dict = {}
+    def __init__(self, purge_interval: float = _PURGE_INTERVAL):
+        """
+        Constructor.
+        :param purge_interval: interval in seconds between purges
+        of expired tokens.
+        """
+        self._dict: dict[int, _TokenRecord] = {}
+        self._expirations: list[tuple[float, int]] = []
+        self._purge_interval = purge_interval
+        self._next_purge = time.time() + purge_interval
 
-    def get(self, user_id: int) -> str | None:
-        token = self._dict.get(user_id)
-        if not token or _is_expired(token):
+    async def get(self, user_id: int) -> str | None:
+        now = time.time()
+        if now >= self._next_purge:
+            self._purge(now)
+        record = self._dict.get(user_id)
+        if record is None or now >= record.exp:
             return None
+        return record.token
+
+    async def put(
+            self,
+            user_id: int,
+            token: str,
+            id_token: str | None = None
+    ) -> None:
+        exp = token_expiry(token)
+        if exp is None:
+            self._dict.pop(user_id, None)
+            return
+        self._dict[user_id] = _TokenRecord(token, exp, id_token)
+        heapq.heappush(self._expirations, (exp, user_id))
+        now = time.time()
+        if now >= self._next_purge:
+            self._purge(now)
+
+    async def renewable(self) -> list[RenewableToken]:
+        now = time.time()
+        return [
+            RenewableToken(user_id, record.token, record.id_token)
+            for user_id, record in self._dict.items()
+            if record.id_token and now < record.exp
+        ]
+
+    def _purge(self, now: float) -> None:
+        """
+        Removes expired tokens.
+        :param now: current time as UNIX timestamp.
+        """
+        while self._expirations and self._expirations[0][0] <= now:
+            exp, user_id = heapq.heappop(self._expirations)
+            record = self._dict.get(user_id)
+            # Token could have been replaced since.
+            if record is not None and record.exp <= now:
+                del self._dict[user_id]
+        self._next_purge = now + self._purge_interval
+
+
+class CachedTokenStore(TokenStore):
+    """
+    In-process LRU read cache in front of another token store.
+    Cached tokens live until they expire. Users without a token may be
+    remembered for a short time, which should be kept off for stores
+    shared between processes, since a token put by another process
+    stays invisible for that time.
+    """
+
+    def __init__(
+            self,
+            store: TokenStore,
+            max_size: int = 10000,
+            negative_ttl: float = 0.0
+    ):
+        """
+        Constructor.
+        :param store: store to cache.
+        :param max_size: max number of cached users.
+        :param negative_ttl: time in seconds users without a token
+        are remembered for, they are not remembered if zero.
+        """
+        self._store = store
+        self._max_size = max_size
+        self._negative_ttl = negative_ttl
+        self._cache: OrderedDict[int, tuple[str | None, float]] = \
+            OrderedDict()
+
+    async def get(self, user_id: int) -> str | None:
+        now = time.time()
+        entry = self._cache.get(user_id)
+        if entry is not None:
+            token, expires_at = entry
+            if now < expires_at:
+                self._cache.move_to_end(user_id)
+                return token
+            del self._cache[user_id]
+
+        token = await self._store.get(user_id)
+        if token is None:
+            if self._negative_ttl > 0:
+                self._remember(user_id, None, now + self._negative_ttl)
+        else:
+            exp = token_expiry(token)
+            if exp is None or exp <= now:
+                return None
+            self._remember(user_id, token, exp)
         return token
 
-    def put(self, user_id: int, token: str) -> None:
-        self._dict[user_id] = token
+    async def put(
+            self,
+            user_id: int,
+            token: str,
+            id_token: str | None = None
+    ) -> None:
+        await self._store.put(user_id, token, id_token)
+        exp = token_expiry(token)
+        if exp is None:
+            self._cache.pop(user_id, None)
+        else:
+            self._remember(user_id, token, exp)
+
+    async def renewable(self) -> list[RenewableToken]:
+        return await self._store.renewable()
+
+    async def lease(self, user_id: int, exp: float) -> bool:
+        return await self._store.lease(user_id, exp)
+
+    async def close(self) -> None:
+        await self._store.close()
+
+    def _remember(
+            self,
+            user_id: int,
+            token: str | None,
+            expires_at: float
+    ) -> None:
+        """
+        Puts entry in cache, evicting least recently used one if full.
+        :param user_id: user ID.
+        :param token: token of user, or None if user has none.
+        :param expires_at: time until which entry is valid.
+        """
+        self._cache[user_id] = (token, expires_at)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
@@ -0,0 +1,251 @@
+from typing import Sequence
+
+from adapters.api.response_cache import ResponseCache
+from adapters.api.token_refresher import TokenRefresher
+from adapters.chat_update_processor import ChatOrderedUpdateProcessor
+from adapters.handlers.utils.render_cache import RenderCache
+from adapters.metrics import Family, Histogram, LoopLagMonitor, \
+    MetricsRegistry
+from adapters.middleware import Middleware, TimingMiddleware
+from adapters.send_scheduler import SendScheduler
+from adapters.update_policy import UpdatePolicy
+
+
+def api_latency(registry: MetricsRegistry) -> Family[Histogram]:
+    """
+    Gets histograms of API call latency.
+    :param registry: registry to get histograms from.
+    :return: histograms labelled by service, endpoint and status.
+    """
+    return registry.histogram(
+        "dwtr_api_request_duration_seconds",
+        "Latency of API calls.",
+        ("service", "endpoint", "status")
+    )
+
+
+def loop_lag_monitor(registry: MetricsRegistry) -> LoopLagMonitor:
+    """
+    Creates monitor of event loop lag recording to registry.
+    :param registry: registry to record lag to.
+    :return: monitor, not started yet.
+    """
+    return LoopLagMonitor(registry.histogram(
+        "dwtr_event_loop_lag_seconds",
+        "How late a sleeping task wakes up."
+    ).labels())
+
+
+def collect_updates(registry: MetricsRegistry, policy: UpdatePolicy) -> None:
+    """
+    Exposes numbers of received and discarded updates.
+    :param registry: registry to expose to.
+    :param policy: update policy counting updates.
+    """
+    received = registry.counter(
+        "dwtr_updates_received_total", "Updates received.", ("type",)
+    )
+    discarded = registry.counter(
+        "dwtr_updates_discarded_total",
+        "Updates no handler accepted.",
+        ("type",)
+    )
+
+    def collect() -> None:
+        for update_type, count in policy.received.items():
+            received.labels(update_type).value = count
+        for update_type, count in policy.discarded.items():
+            discarded.labels(update_type).value = count
+
+    registry.on_collect(collect)
+
+
+def collect_update_processor(
+        registry: MetricsRegistry,
+        processor: ChatOrderedUpdateProcessor
+) -> None:
+    """
+    Exposes queue depth and in-flight updates of every worker.
+    :param registry: registry to expose to.
+    :param processor: processor handling updates concurrently.
+    """
+    depth = registry.gauge(
+        "dwtr_update_queue_depth",
+        "Updates waiting in queue of worker.",
+        ("worker",)
+    )
+    in_flight = registry.gauge(
+        "dwtr_updates_in_flight",
+        "Updates being processed by worker.",
+        ("worker",)
+    )
+
+    def collect() -> None:
+        # Queues are created once processor is initialized.
+        workers = zip(processor.queue_depths, processor.in_flight)
+        for i, (queued, running) in enumerate(workers):
+            worker = str(i)
+            depth.labels(worker).value = queued
+            in_flight.labels(worker).value = running
+
+    registry.on_collect(collect)
+
+
+def collect_commands(
+        registry: MetricsRegistry,
+        middlewares: Sequence[Middleware]
+) -> None:
+    """
+    Exposes latency of commands recorded by timing middleware.
+    :param registry: registry to expose to.
+    :param middlewares: middlewares of bot logic.
+    """
+    latency = registry.histogram(
+        "dwtr_command_duration_seconds",
+        "Time to handle command.",
+        ("command",)
+    )
+    timings = [m for m in middlewares if isinstance(m, TimingMiddleware)]
+
+    def collect() -> None:
+        for timing in timings:
+            for command, histogram in timing.histograms.items():
+                latency.bind((command,), histogram)
+
+    registry.on_collect(collect)
+
+
+def collect_response_cache(
+        registry: MetricsRegistry,
+        cache: ResponseCache
+) -> None:
+    """
+    Exposes counters of API response cache.
+    :param registry: registry to expose to.
+    :param cache: cache to expose counters of.
+    """
+    lookups = registry.counter(
+        "dwtr_cache_lookups_total",
+        "Lookups of API response cache by result.",
+        ("namespace", "result")
+    )
+    evictions = registry.counter(
+        "dwtr_cache_evictions_total",
+        "Entries evicted from memory because of size limit.",
+        ("namespace",)
+    )
+    ratio = registry.gauge(
+        "dwtr_cache_hit_ratio",
+        "Share of lookups served from cache.",
+        ("namespace",)
+    )
+    memory = registry.gauge(
+        "dwtr_cache_memory_bytes", "Size of cached responses in memory."
+    )
+
+    def collect() -> None:
+        for namespace, stats in cache.stats.items():
+            lookups.labels(namespace, "hit").value = stats.hits
+            lookups.labels(namespace, "disk_hit").value = stats.disk_hits
+            lookups.labels(namespace, "stale_hit").value = stats.stale_hits
+            lookups.labels(namespace, "miss").value = stats.misses
+            evictions.labels(namespace).value = stats.evictions
+            total = stats.hits + stats.misses
+            ratio.labels(namespace).value = \
+                stats.hits / total if total else 0.0
+        memory.labels().value = cache.memory_bytes
+
+    registry.on_collect(collect)
+
+
+def collect_render_cache(
+        registry: MetricsRegistry,
+        renders: RenderCache
+) -> None:
+    """
+    Exposes counters of rendered messages cache.
+    :param registry: registry to expose to.
+    :param renders: cache to expose counters of.
+    """
+    lookups = registry.counter(
+        "dwtr_render_cache_lookups_total",
+        "Lookups of rendered messages cache by result.",
+        ("result",)
+    )
+    ratio = registry.gauge(
+        "dwtr_render_cache_hit_ratio",
+        "Share of messages not rendered again."
+    )
+
+    def collect() -> None:
+        lookups.labels("hit").value = renders.hits
+        lookups.labels("miss").value = renders.misses
+        total = renders.hits + renders.misses
+        ratio.labels().value = renders.hits / total if total else 0.0
+
+    registry.on_collect(collect)
+
+
+def collect_sends(registry: MetricsRegistry, scheduler: SendScheduler) -> None:
+    """
+    Exposes counters and latency of sends to Telegram.
+    :param registry: registry to expose to.
+    :param scheduler: scheduler making sends.
+    """
+    registry.histogram(
+        "dwtr_telegram_request_duration_seconds",
+        "Latency of requests sending messages, excluding time in queue."
+    ).bind((), scheduler.latency)
+    sends = registry.counter(
+        "dwtr_telegram_sends_total", "Sends by result.", ("result",)
+    )
+    throttled = registry.counter(
+        "dwtr_telegram_throttled_total",
+        "Responses asking to retry later (HTTP 429)."
+    )
+    pending = registry.gauge(
+        "dwtr_telegram_send_queue_size", "Sends waiting in queue."
+    )
+    queue_latency = registry.gauge(
+        "dwtr_telegram_send_queue_latency_seconds",
+        "Moving average of time sends wait in queue."
+    )
+
+    def collect() -> None:
+        stats = scheduler.stats
+        sends.labels("sent").value = stats.sent
+        sends.labels("failed").value = stats.failed
+        throttled.labels().value = stats.throttled
+        pending.labels().value = scheduler.pending
+        queue_latency.labels().value = stats.queue_latency
+
+    registry.on_collect(collect)
+
+
+def collect_token_refresher(
+        registry: MetricsRegistry,
+        refresher: TokenRefresher
+) -> None:
+    """
+    Exposes latency and results of access token renewals.
+    :param registry: registry to expose to.
+    :param refresher: token store renewing tokens.
+    """
+    registry.histogram(
+        "dwtr_token_refresh_duration_seconds",
+        "Latency of requests renewing access tokens."
+    ).bind((), refresher.latency)
+    renewals = registry.counter(
+        "dwtr_token_refreshes_total", "Token renewals by result.", ("result",)
+    )
+    scheduled = registry.gauge(
+        "dwtr_token_refreshes_scheduled", "Users whose renewal is scheduled."
+    )
+
+    def collect() -> None:
+        renewals.labels("ok").value = refresher.refreshed
+        renewals.labels("failed").value = refresher.failed
+        renewals.labels("abandoned").value = refresher.abandoned
+        scheduled.labels().value = refresher.scheduled
+
+    registry.on_collect(collect)
@@ -0,0 +1,222 @@
+import asyncio
+import itertools
+import logging
+import os
+import time
+from typing import AsyncIterator, Iterator
+
+from adapters.api.cached_audio_play_service import CachingAudioPlayService
+from adapters.api.catalog import SqliteCatalog
+from adapters.api.compact_catalog import CompactAudioPlay, \
+    CompactCatalog, write_compact_catalog
+from adapters.logs import Event
+from adapters.search_index import SearchIndex
+from api.audio_play_service import AudioPlayService
+from api.covers import CoverStore
+from api.model.audio_play import AudioPlay, ListAudioPlaysResponse
+from api.model.error_response import ErrorResponse
+
+_PAGE_SIZE = 200
+_INTERVAL = 3600.0
+_BATCH_SIZE = 500
+
+
+class CatalogSync:
+    """
+    Keeps local catalog in sync with the remote one.
+
+    Catalog is listed page by page, so only one page is held in memory.
+    The first sync lists everything, later ones pass the token given on
+    the last page of the previous sync and get only changed audio plays.
+    The token is stored only when a sync completes, so an interrupted
+    sync is repeated from the same point.
+
+    On start, the local catalog fills the search index. The response
+    cache isn't warmed, as it reads the catalog itself when needed.
+    Synced audio plays update the index, while only changed ones
+    replace cached versions. Uploaded covers of audio plays whose
+    cover was changed are forgotten.
+
+    If snapshot path is given, the catalog is also written there in
+    compact format after every sync that changed something, and
+    the index is filled with records of the snapshot, which stays
+    mapped while they're used.
+    """
+
+    def __init__(
+            self,
+            aps: AudioPlayService,
+            catalog: SqliteCatalog,
+            cache: CachingAudioPlayService | None = None,
+            index: SearchIndex | None = None,
+            cs: CoverStore | None = None,
+            page_size: int = _PAGE_SIZE,
+            interval: float = _INTERVAL,
+            snapshot: str | None = None
+    ):
+        """
+        Constructor.
+        :param aps: audio play service to list catalog with.
+        :param catalog: local catalog.
+        :param cache: response cache to update.
+        :param index: search index to fill.
+        :param cs: cover store to forget changed covers in.
+        :param page_size: number of audio plays requested per page.
+        :param interval: time in seconds between syncs.
+        :param snapshot: path to compact snapshot of the catalog.
+        """
+        self._aps = aps
+        self._catalog = catalog
+        self._cache = cache
+        self._index = index
+        self._cs = cs
+        self._page_size = page_size
+        self._interval = interval
+        self._snapshot = snapshot
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Fills index from local catalog and starts periodic sync."""
+        await self.warm()
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        """Stops periodic sync."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def warm(self) -> None:
+        """Fills search index from local catalog."""
+        if self._index is None:
+            return
+        start = time.perf_counter()
+        count = 0
+        batches = self._read_batches()
+        while batch := await asyncio.to_thread(next, batches, None):
+            count += len(batch)
+            self._index.add_all(batch)
+        if self._catalog.sync_token:
+            self._index.complete = True
+        logging.info(Event(
+            "warmed",
+            count=count,
+            duration=round(time.perf_counter() - start, 3)
+        ))
+
+    async def sync(self) -> bool:
+        """
+        Fetches audio plays changed since the last sync.
+        :return: whether sync completed.
+        """
+        sync_token = await asyncio.to_thread(
+            lambda: self._catalog.sync_token
+        )
+        count = 0
+        async for page in self._pages(sync_token):
+            if isinstance(page, ErrorResponse):
+                if sync_token:
+                    # The token might be expired, so the next sync
+                    # starts over.
+                    logging.warning(Event(
+                        "sync_failed",
+                        status=page.status.name,
+                        message=page.message
+                    ))
+                    await asyncio.to_thread(
+                        setattr, self._catalog, "sync_token", None
+                    )
+                return False
+            await self._apply(page)
+            count += len(page.audio_plays)
+            if page.next_page_token is None:
+                await asyncio.to_thread(
+                    setattr, self._catalog, "sync_token", page.sync_token
+                )
+                if self._index is not None and page.sync_token:
+                    self._index.complete = True
+                if self._snapshot and (
+                        count or not os.path.exists(self._snapshot)
+                ):
+                    await asyncio.to_thread(self._write_snapshot)
+                logging.info(Event("synced", count=count))
+                return True
+        return False
+
+    async def _pages(
+            self,
+            sync_token: str | None
+    ) -> AsyncIterator[ListAudioPlaysResponse | ErrorResponse]:
+        """
+        Lists catalog page by page.
+        :param sync_token: token of the previous sync.
+        :return: generator of pages, ending with error response
+        if listing failed.
+        """
+        page_token = None
+        while True:
+            page = await self._aps.list(
+                self._page_size, page_token, sync_token
+            )
+            if page is None:
+                return
+            yield page
+            if isinstance(page, ErrorResponse):
+                return
+            page_token = page.next_page_token
+            if page_token is None:
+                return
+
+    async def _apply(self, page: ListAudioPlaysResponse) -> None:
+        """
+        Stores page of audio plays and updates caches. Only audio plays
+        that differ from stored versions are put in response cache, so
+        a full sync doesn't evict everything else from it.
+        :param page: page of audio plays.
+        """
+        changed = await asyncio.to_thread(
+            self._catalog.put_many, page.audio_plays
+        )
+        new = {a.id: a for a in page.audio_plays}
+        if self._cs is not None:
+            for old in changed:
+                if old.cover_uri != new[old.id].cover_uri:
+                    self._cs.forget(old.id)
+        if self._cache is not None and changed:
+            await self._cache.remember(new[old.id] for old in changed)
+        if self._index is not None:
+            self._index.add_all(page.audio_plays)
+
+    def _read_batches(
+            self
+    ) -> Iterator[list[AudioPlay] | list[CompactAudioPlay]]:
+        """
+        Reads local catalog in batches, from snapshot if there's one.
+        Snapshot isn't closed, as its records refer to it, and it's
+        unmapped once they're all collected.
+        :return: generator of batches.
+        """
+        if not self._snapshot or not os.path.exists(self._snapshot):
+            yield from self._catalog.iterate(_BATCH_SIZE)
+            return
+        audio_plays = iter(CompactCatalog(self._snapshot))
+        while batch := list(itertools.islice(audio_plays, _BATCH_SIZE)):
+            yield batch
+
+    def _write_snapshot(self) -> None:
+        """Writes compact snapshot of local catalog."""
+        count = write_compact_catalog(
+            self._snapshot,
+            itertools.chain.from_iterable(self._catalog.iterate(_BATCH_SIZE))
+        )
+        logging.info(Event("snapshot_written", count=count))
+
+    async def _sync_loop(self) -> None:
+        """Syncs catalog periodically."""
+        while True:
+            try:
+                await self.sync()
+            except Exception:
+                logging.exception("Error while syncing catalog.")
+            await asyncio.sleep(self._interval)
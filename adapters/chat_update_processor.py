@@ -0,0 +1,132 @@
+import asyncio
+import logging
+from typing import Any, Awaitable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+_PENDING_PER_WORKER = 16
+
+_Job = tuple[Awaitable[Any], asyncio.Future]
+
+
+def _chat_key(update: object) -> int | None:
+    """
+    Gets key updates are ordered by.
+    :param update: update received from Telegram.
+    :return: chat ID, or user ID for chatless updates,
+    None if update has neither.
+    """
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat:
+        return update.effective_chat.id
+    if update.effective_user:
+        return update.effective_user.id
+    return None
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processes updates of different chats concurrently while
+    keeping updates of the same chat in order they were received.
+
+    Every chat is pinned to one of the workers by its ID, each worker
+    handles its queue one update at a time. Therefore, number of workers
+    is the limit of updates being processed at the same time.
+    """
+
+    def __init__(self, workers: int, max_pending: int | None = None):
+        """
+        Constructor.
+        :param workers: number of workers, i.e. concurrency limit.
+        :param max_pending: max number of updates accepted for processing,
+        both queued and in flight. Updates above this limit wait in
+        the application update queue.
+        """
+        if workers < 1:
+            raise ValueError("At least one worker is required.")
+        super().__init__(max_pending or workers * _PENDING_PER_WORKER)
+        self._workers = workers
+        self._queues: list[asyncio.Queue[_Job]] = []
+        self._tasks: list[asyncio.Task] = []
+        self._in_flight = [0] * workers
+        self._next_worker = 0
+
+    @property
+    def queue_depths(self) -> list[int]:
+        """Number of updates waiting in queue of each worker."""
+        return [q.qsize() for q in self._queues]
+
+    @property
+    def in_flight(self) -> list[int]:
+        """Number of updates being processed by each worker."""
+        return list(self._in_flight)
+
+    async def do_process_update(
+            self,
+            update: object,
+            coroutine: Awaitable[Any],
+    ) -> None:
+        # Enqueue synchronously, before anything is awaited: this
+        # method is entered in the order updates were received,
+        # so queues keep the same order.
+        future = asyncio.get_running_loop().create_future()
+        self._queues[self._choose_worker(update)].put_nowait(
+            (coroutine, future)
+        )
+        await future
+
+    async def initialize(self) -> None:
+        self._queues = [asyncio.Queue() for _ in range(self._workers)]
+        self._tasks = [
+            asyncio.create_task(self._work(i), name=f"update-worker-{i}")
+            for i in range(self._workers)
+        ]
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for queue in self._queues:
+            while not queue.empty():
+                coroutine, future = queue.get_nowait()
+                coroutine.close()
+                future.cancel()
+        self._tasks = []
+
+    def _choose_worker(self, update: object) -> int:
+        """
+        Chooses worker for an update.
+        :param update: update to process.
+        :return: worker index.
+        """
+        key = _chat_key(update)
+        if key is None:
+            self._next_worker = (self._next_worker + 1) % self._workers
+            return self._next_worker
+        return key % self._workers
+
+    async def _work(self, index: int) -> None:
+        """
+        Processes updates from worker queue one by one.
+        :param index: worker index.
+        """
+        queue = self._queues[index]
+        while True:
+            coroutine, future = await queue.get()
+            self._in_flight[index] += 1
+            try:
+                result = await coroutine
+                if not future.done():
+                    future.set_result(result)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                else:
+                    logging.exception("Update processing failed.")
+            finally:
+                self._in_flight[index] -= 1
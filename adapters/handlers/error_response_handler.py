@@ -1,4 +1,4 @@
-from adapters.handlers.utils.markdown import bold
+from adapters.handlers.utils.markdown import bold, code, escape
 from api.model.error_response import ErrorResponse
 from logics.bot import Bot
 from logics.message import BotMessage
@@ -12,14 +12,14 @@ def _error_message(error: ErrorResponse) -> BotMessage:
     """
     lines = [
         f"❌ {bold("Error")}\n",
-        f"{bold("Status")} `{error.status.name}`",
-        f"{bold("Message")} {error.message}"
+        f"{bold("Status")} {code(error.status.name)}",
+        f"{bold("Message")} {escape(error.message)}"
     ]
     if error.details and error.details.info:
         reason = error.details.info.reason
         domain = error.details.info.domain
-        lines.append(f"{bold("Reason")} `{reason}`")
-        lines.append(f"{bold("Domain")} `{domain}`")
+        lines.append(f"{bold("Reason")} {code(reason)}")
+        lines.append(f"{bold("Domain")} {code(domain)}")
     return BotMessage(text="\n".join(lines))
 
 
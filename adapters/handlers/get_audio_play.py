@@ -1,30 +1,64 @@
+import asyncio
+import dataclasses
 import logging
 
-import requests
 from uuid import UUID
 
-from typing import Sequence
+from typing import Awaitable, Sequence, TypeVar
 
 from adapters.handlers.error_response_handler import handle_error_response
 from adapters.handlers.utils.audio_plays import make_released, make_starring, \
     make_written_by
-from adapters.handlers.utils.markdown import HORIZONTAL_RULE, bold, h1, h2, link
+from adapters.handlers.utils.markdown import HORIZONTAL_RULE, bold, escape, \
+    h1, h2, link
+from adapters.handlers.utils.render_cache import RenderCache
+from adapters.logs import Event, sampled
 from api.audio_play_service import AudioPlayService
+from api.covers import CoverStore
 from api.tokens import TokenStore
-from logics.bot import Bot
+from logics.bot import Bot, ImageRejectedError, Priority
 from logics.logic import Logic
-from logics.message import BotMessage
+from logics.message import BotMessage, static
 from api.model.audio_play import AudioPlay, AudioPlayLocation, CastMember, \
     EpisodeType
 from api.model.error_response import ErrorResponse
 from api.model.external_resource import ExternalResource
 
-_NOT_UUID = BotMessage(
-    text="UUID was expected."
-)
+_NOT_UUID = static(BotMessage(
+    text="UUID was expected\\."
+))
 
 _BLOCK_SEPARATOR = HORIZONTAL_RULE + "\n"
 
+_GET_TIMEOUT = 10.0
+_COVER_TIMEOUT = 5.0
+_LOCATION_TIMEOUT = 5.0
+_SEND_TIMEOUT = 15.0
+
+_CARD = "card"
+_DETAILS = "details"
+
+T = TypeVar("T")
+
+
+async def _with_timeout(
+        aw: Awaitable[T],
+        timeout: float,
+        stage: str
+) -> T | None:
+    """
+    Awaits given awaitable, giving up after timeout.
+    :param aw: awaitable to wait for.
+    :param timeout: timeout in seconds.
+    :param stage: stage name for logging.
+    :return: result, or None if timed out.
+    """
+    try:
+        return await asyncio.wait_for(aw, timeout)
+    except TimeoutError:
+        logging.warning(Event("timeout", stage=stage, after=timeout))
+        return None
+
 
 def _make_series_info(audio_play: AudioPlay) -> str | None:
     """
@@ -34,7 +68,7 @@ def _make_series_info(audio_play: AudioPlay) -> str | None:
     els = [audio_play.series_season, audio_play.series_number]
     separator = "." if audio_play.episode_type == EpisodeType.REGULAR else "SP"
     number = separator.join(str(x) for x in els if x is not None)
-    return " ".join((audio_play.series.name, number))
+    return escape(" ".join((audio_play.series.name, number)))
 
 
 def _make_resources(res: Sequence[ExternalResource]) -> Sequence[str]:
@@ -43,7 +77,7 @@ def _make_resources(res: Sequence[ExternalResource]) -> Sequence[str]:
     :param res: resources to display.
     :return: resources block lines or None if no resources are given.
     """
-    return [f"{r.resource_type}: {link("link", r.link)}" for r in res]
+    return [f"{escape(r.resource_type)}: {link("link", r.link)}" for r in res]
 
 
 def _make_cast(cast: Sequence[CastMember]) -> Sequence[str]:
@@ -56,30 +90,21 @@ def _make_cast(cast: Sequence[CastMember]) -> Sequence[str]:
 
     def _make_entry(c: CastMember) -> str:
         roles = " / ".join(c.roles)
-        return f"{bold(c.actor.name)} ({roles})"
+        return f"{bold(c.actor.name)} {escape(f"({roles})")}"
 
     return [_make_entry(m) for m in sorted_cast]
 
 
-def _get_cover(cover_uri: str) -> bytes | None:
-    """
-    Retrieves cover by URI.
-    :rtype: bytes | None cover as bytes if success, otherwise None.
-    """
-    response = requests.get(cover_uri)
-    if response.status_code == 200:
-        image_data = response.content
-        return image_data
-    return None
-
-
-def _make_card_message(audio_play: AudioPlay) -> BotMessage:
+def _make_card_message(
+        audio_play: AudioPlay,
+        cover: str | bytes | None
+) -> BotMessage:
     """
     Makes audio play card message, i.e. cover with basic info.
     :param audio_play: audio play to make card of.
+    :param cover: cover as bytes or ID of uploaded cover.
     :return: bot message.
     """
-    cover = _get_cover(audio_play.cover_uri) if audio_play.cover_uri else None
     series_info = _make_series_info(audio_play)
     written_by = make_written_by(audio_play.writers)
     starring = make_starring(audio_play.cast)
@@ -96,10 +121,7 @@ def _make_card_message(audio_play: AudioPlay) -> BotMessage:
     return BotMessage(text=text, image=cover)
 
 
-def _make_details_message(
-        audio_play: AudioPlay,
-        location: str | None
-) -> BotMessage | None:
+def _make_details_message(audio_play: AudioPlay) -> BotMessage | None:
     """
     Makes message with audio play details like
     synopsis, cast and external resources.
@@ -107,16 +129,10 @@ def _make_details_message(
     the above is present, otherwise None.
     """
     cast = _make_cast(audio_play.cast)
-    resources = [
-        x for x in
-        (
-            *_make_resources(audio_play.external_resources),
-            f"self-hosted: {link("link", location)}" if location else None,
-        ) if x is not None
-    ]
+    resources = _make_resources(audio_play.external_resources)
 
     blocks = filter(lambda x: x is not None, (
-        (h2("Synopsis") + "\n" + audio_play.synopsis)
+        (h2("Synopsis") + "\n" + escape(audio_play.synopsis))
         if audio_play.synopsis else None,
 
         (h2("Cast") + "\n" + "\n".join(cast))
@@ -129,17 +145,52 @@ def _make_details_message(
     return BotMessage(text=text) if text else None
 
 
+def _add_location(
+        details: BotMessage,
+        audio_play: AudioPlay,
+        location: str | None
+) -> BotMessage:
+    """
+    Adds self-hosted location to links of details message.
+    :param details: details message, possibly rendered.
+    :param audio_play: audio play details are made of.
+    :param location: self-hosted location of user.
+    :return: details message with location.
+    """
+    if not location:
+        return details
+    line = f"self\\-hosted: {link("link", location)}"
+    if audio_play.external_resources:
+        # Links block is the last one.
+        text = details.text + "\n" + line
+    else:
+        block = h2("Links") + "\n" + line
+        text = details.text + _BLOCK_SEPARATOR + block \
+            if details.text else block
+    return dataclasses.replace(details, text=text)
+
+
 class GetAudioPlayHandler(Logic):
     """Displays one audio play found by ID in message."""
 
-    def __init__(self, aps: AudioPlayService, ts: TokenStore):
+    def __init__(
+            self,
+            aps: AudioPlayService,
+            ts: TokenStore,
+            cs: CoverStore,
+            renders: RenderCache | None = None
+    ):
         """
         Constructor.
         :param aps: audio play service to make search calls to.
         :param ts: token store to get user tokens from.
+        :param cs: cover store to reuse uploaded covers from.
+        :param renders: cache of rendered cards and details.
         """
         self._aps = aps
         self._ts = ts
+        self._cs = cs
+        self._renders = renders if renders is not None else RenderCache()
 
     async def process_message(
             self,
@@ -155,34 +206,131 @@ class GetAudioPlayHandler(Logic):
                 message=_NOT_UUID,
                 user_id=user_id)
 
-        match self._aps.get(guid):
+        match await _with_timeout(self._aps.get(guid), _GET_TIMEOUT, "get"):
             case AudioPlay() as audio_play:
-                location = self._get_location(user_id, guid)
-                await bot.send_message(
-                    message=_make_card_message(audio_play),
-                    user_id=user_id
-                )
-                details = _make_details_message(audio_play, location)
-                return await bot.send_message(
-                    message=details,
-                    user_id=user_id
-                ) if details else None
+                return await self._send_audio_play(user_id, audio_play, bot)
             case ErrorResponse() as response:
                 return await handle_error_response(user_id, response, bot)
             case _:
                 return
 
-    def _get_location(self, user_id: int, guid: UUID) -> str | None:
+    async def _send_audio_play(
+            self,
+            user_id: int,
+            audio_play: AudioPlay,
+            bot: Bot
+    ) -> None:
+        """
+        Sends audio play card and details. Location is fetched
+        while the card is being prepared and sent, details are sent
+        once both location is known and card is sent.
+        :param user_id: ID of user who performs this action.
+        :param audio_play: audio play to send.
+        :param bot: bot to send messages with.
+        """
+        location_task = asyncio.create_task(_with_timeout(
+            self._get_location(user_id, audio_play.id),
+            _LOCATION_TIMEOUT,
+            "location"
+        ))
+        try:
+            await _with_timeout(
+                self._send_card(user_id, audio_play, bot),
+                _SEND_TIMEOUT,
+                "card"
+            )
+            location = await location_task
+        finally:
+            location_task.cancel()
+
+        # Location is user-specific, so it's added to details
+        # taken from cache for every user.
+        details = _add_location(self._renders.render(
+            (audio_play.id, _DETAILS),
+            audio_play,
+            lambda: _make_details_message(audio_play) or BotMessage(),
+            bot
+        ), audio_play, location)
+        if details.text:
+            # The card already answers the user, so details give way
+            # to first replies to other users.
+            await _with_timeout(
+                bot.send_message(
+                    message=details,
+                    user_id=user_id,
+                    priority=Priority.BACKGROUND
+                ),
+                _SEND_TIMEOUT,
+                "details"
+            )
+
+    async def _send_card(
+            self,
+            user_id: int,
+            audio_play: AudioPlay,
+            bot: Bot
+    ) -> None:
+        """
+        Sends audio play card, reusing cover if it was uploaded before.
+        :param user_id: ID of user who performs this action.
+        :param audio_play: audio play to send card of.
+        :param bot: bot to send card with.
+        """
+        cover_uri = audio_play.cover_uri
+        cover: str | bytes | None = None
+        if cover_uri:
+            cover = self._cs.get(audio_play.id, cover_uri)
+            if cover is None:
+                cover = await self._download_cover(cover_uri)
+
+        card = self._renders.render(
+            (audio_play.id, _CARD),
+            audio_play,
+            lambda: _make_card_message(audio_play, None),
+            bot
+        )
+        try:
+            sent = await bot.send_message(
+                message=dataclasses.replace(card, image=cover),
+                user_id=user_id
+            )
+        except ImageRejectedError:
+            # Uploaded cover expired or belongs to another bot.
+            logging.warning(Event("cover_rejected", audio_play=audio_play.id))
+            self._cs.forget(audio_play.id)
+            cover = await self._download_cover(cover_uri)
+            sent = await bot.send_message(
+                message=dataclasses.replace(card, image=cover),
+                user_id=user_id
+            )
+        if cover_uri and isinstance(cover, bytes) \
+                and sent and sent.image_id:
+            self._cs.put(audio_play.id, cover_uri, sent.image_id)
+
+    async def _download_cover(self, cover_uri: str) -> bytes | None:
+        """
+        Downloads cover.
+        :param cover_uri: URI of the cover.
+        :return: cover, or None if it couldn't be downloaded in time.
+        """
+        return await _with_timeout(
+            self._aps.get_cover(cover_uri),
+            _COVER_TIMEOUT,
+            "cover"
+        )
+
+    async def _get_location(self, user_id: int, guid: UUID) -> str | None:
         """
         Gets self-hosted location from service.
         :param user_id: ID of user who performs this action.
         :param guid: ID of an audio play.
         :return: string if found, otherwise None.
         """
-        token = self._ts.get(user_id)
+        token = await self._ts.get(user_id)
         if token:
-            response = self._aps.get_location(token, guid)
+            response = await self._aps.get_location(token, guid)
             if isinstance(response, AudioPlayLocation):
-                logging.info(f"Received self-hosted location of {guid}")
+                if sampled("location"):
+                    logging.info(Event("location", audio_play=guid))
                 return response.uri
         return None
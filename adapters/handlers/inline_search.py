@@ -0,0 +1,269 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Sequence
+
+from adapters.handlers.utils.audio_plays import make_released, make_starring, \
+    make_written_by
+from adapters.handlers.utils.markdown import bold
+from api.audio_play_service import AudioPlayService
+from api.model.audio_play import AudioPlay, SearchAudioPlaysResponse
+from logics.inline import InlineLogic, InlinePage, InlineResult
+from logics.message import BotMessage
+
+_DEBOUNCE = 0.3
+_TTL = 60.0
+_MAX_QUERIES = 1000
+_WINDOW = 50
+_PAGE_SIZE = 10
+
+
+def _normalize(query: str) -> str:
+    """
+    Normalizes query, so that equal queries have equal keys.
+    :param query: query typed by user.
+    :return: normalized query.
+    """
+    return " ".join(query.lower().split())
+
+
+def _make_haystack(audio_play: AudioPlay) -> str:
+    """
+    Makes text audio play is filtered locally by.
+    :param audio_play: audio play.
+    :return: lowercase text with title, series, writers and cast.
+    """
+    return " ".join((
+        audio_play.title,
+        audio_play.series.name if audio_play.series else "",
+        *(w.name for w in audio_play.writers),
+        *(c.actor.name for c in audio_play.cast),
+    )).lower()
+
+
+def _make_result(audio_play: AudioPlay) -> InlineResult:
+    """
+    Makes inline result of an audio play.
+    :param audio_play: audio play to show.
+    :return: inline result.
+    """
+    lines = (
+        bold(audio_play.title),
+        make_written_by(audio_play.writers),
+        make_starring(audio_play.cast),
+        make_released(audio_play.release_date),
+    )
+    return InlineResult(
+        id=str(audio_play.id),
+        title=audio_play.title,
+        message=BotMessage(text="\n".join(x for x in lines if x)),
+        description=", ".join(w.name for w in audio_play.writers) or None,
+        thumbnail=audio_play.cover_uri,
+    )
+
+
+@dataclass
+class _CachedQuery:
+    """
+    Results of remote search.
+    :param expires_at: UNIX timestamp results are valid until.
+    :param results: found audio plays with their haystacks.
+    """
+    expires_at: float
+    results: list[tuple[AudioPlay, str]]
+
+
+class InlineSearchHandler(InlineLogic):
+    """
+    Searches audio plays by inline queries.
+
+    Inline queries come on every keystroke, so the first page of
+    a query is requested only if user doesn't type further for a while.
+    Every user has at most one request scheduled, a newer keystroke
+    replaces it. Results are cached for a short time by normalized
+    query. Until a query is requested, results of its cached prefix
+    are filtered locally and shown instead.
+    """
+
+    def __init__(
+            self,
+            aps: AudioPlayService,
+            debounce: float = _DEBOUNCE,
+            ttl: float = _TTL
+    ):
+        """
+        Constructor.
+        :param aps: audio play service to make search calls to.
+        :param debounce: time in seconds to wait for next keystroke.
+        :param ttl: time to live of cached results.
+        """
+        self._aps = aps
+        self._debounce = debounce
+        self._ttl = ttl
+        self._cache: OrderedDict[str, _CachedQuery] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self._scheduled: dict[int, asyncio.Task] = {}
+
+    async def process_inline_query(
+            self,
+            user_id: int,
+            query: str,
+            offset: str
+    ) -> InlinePage | None:
+        normalized = _normalize(query)
+        if not normalized:
+            return None
+        start = int(offset) if offset.isdigit() else 0
+
+        cached = self._get_cached(normalized)
+        if cached is None:
+            task = self._schedule(user_id, normalized)
+            prefix = self._get_cached_prefix(normalized)
+            if prefix is not None:
+                terms = normalized.split()
+                return self._make_page([
+                    a for a, haystack in prefix.results
+                    if all(t in haystack for t in terms)
+                ], start, cache_time=0)
+
+            await asyncio.wait((task,))
+            if task.cancelled():
+                # User typed further.
+                return None
+            cached = task.result()
+            if cached is None:
+                return InlinePage(results=[])
+        else:
+            self._cancel_scheduled(user_id)
+
+        return self._make_page(
+            [a for a, _ in cached.results],
+            start,
+            cache_time=int(self._ttl)
+        )
+
+    def _schedule(self, user_id: int, normalized: str) -> asyncio.Task:
+        """
+        Schedules remote search after debounce time, replacing search
+        scheduled for the previous query of the same user.
+        :param user_id: ID of user.
+        :param normalized: normalized query.
+        :return: task of the scheduled search.
+        """
+        self._cancel_scheduled(user_id)
+        task = asyncio.create_task(self._fetch_later(normalized))
+        self._scheduled[user_id] = task
+        task.add_done_callback(
+            lambda _: self._forget_scheduled(user_id, task)
+        )
+        return task
+
+    def _cancel_scheduled(self, user_id: int) -> None:
+        """
+        Cancels search scheduled for user. Search already started
+        still completes and is cached.
+        :param user_id: ID of user.
+        """
+        task = self._scheduled.pop(user_id, None)
+        if task is not None:
+            task.cancel()
+
+    def _forget_scheduled(self, user_id: int, task: asyncio.Task) -> None:
+        """
+        Removes finished search unless it was replaced by a newer one.
+        :param user_id: ID of user.
+        :param task: finished task.
+        """
+        if self._scheduled.get(user_id) is task:
+            del self._scheduled[user_id]
+
+    async def _fetch_later(self, normalized: str) -> _CachedQuery | None:
+        """
+        Waits for debounce time, then searches remotely.
+        :param normalized: normalized query.
+        :return: results, or None if search failed.
+        """
+        await asyncio.sleep(self._debounce)
+        return await asyncio.shield(self._fetch_once(normalized))
+
+    def _get_cached(self, normalized: str) -> _CachedQuery | None:
+        """
+        Gets cached results of query.
+        :param normalized: normalized query.
+        :return: results if cached and not expired.
+        """
+        cached = self._cache.get(normalized)
+        if cached is None:
+            return None
+        if time.time() >= cached.expires_at:
+            del self._cache[normalized]
+            return None
+        self._cache.move_to_end(normalized)
+        return cached
+
+    def _get_cached_prefix(self, normalized: str) -> _CachedQuery | None:
+        """
+        Gets cached results of the longest prefix of query.
+        :param normalized: normalized query.
+        :return: results if any prefix is cached.
+        """
+        for end in range(len(normalized) - 1, 0, -1):
+            cached = self._get_cached(normalized[:end].rstrip())
+            if cached is not None:
+                return cached
+        return None
+
+    def _fetch_once(self, normalized: str) -> asyncio.Task:
+        """
+        Starts remote search unless the same one is already in flight.
+        :param normalized: normalized query.
+        :return: task of the search.
+        """
+        task = self._in_flight.get(normalized)
+        if task is None:
+            task = asyncio.create_task(self._fetch(normalized))
+            self._in_flight[normalized] = task
+            task.add_done_callback(
+                lambda _: self._in_flight.pop(normalized, None)
+            )
+        return task
+
+    async def _fetch(self, normalized: str) -> _CachedQuery | None:
+        """
+        Searches audio plays remotely and caches results.
+        :param normalized: normalized query.
+        :return: results, or None if search failed.
+        """
+        response = await self._aps.search(normalized, _WINDOW)
+        if not isinstance(response, SearchAudioPlaysResponse):
+            return None
+        cached = _CachedQuery(
+            expires_at=time.time() + self._ttl,
+            results=[(a, _make_haystack(a)) for a in response.audio_plays]
+        )
+        self._cache[normalized] = cached
+        self._cache.move_to_end(normalized)
+        while len(self._cache) > _MAX_QUERIES:
+            self._cache.popitem(last=False)
+        return cached
+
+    @staticmethod
+    def _make_page(
+            audio_plays: Sequence[AudioPlay],
+            start: int,
+            cache_time: int
+    ) -> InlinePage:
+        """
+        Makes page of results.
+        :param audio_plays: all results.
+        :param start: index of the first result on page.
+        :param cache_time: time in seconds page may be cached for.
+        :return: page.
+        """
+        end = start + _PAGE_SIZE
+        return InlinePage(
+            results=[_make_result(a) for a in audio_plays[start:end]],
+            next_offset=str(end) if end < len(audio_plays) else None,
+            cache_time=cache_time
+        )
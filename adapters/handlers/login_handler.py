@@ -1,6 +1,7 @@
 import logging
 
 from adapters.handlers.error_response_handler import handle_error_response
+from adapters.logs import Event
 from api.authentication_service import AuthenticationService
 from api.model.authentication import \
     AuthenticateUserResponse, BasicAuthentication
@@ -8,19 +9,23 @@ from api.model.error_response import ErrorResponse
 from api.tokens import TokenStore
 from logics.bot import Bot
 from logics.logic import Logic
-from logics.message import BotMessage
+from logics.message import BotMessage, static
 
-_INVALID_ARGUMENTS = BotMessage(
+_INVALID_ARGUMENTS = static(BotMessage(
     text="Invalid arguments, "
          "two arguments are expected: "
-         "username and password."
-)
+         "username and password\\."
+))
 
 
 class LoginCommandHandler(Logic):
     """Handler of login command."""
 
-    def __init__(self, aus: AuthenticationService, ts: TokenStore):
+    def __init__(
+            self,
+            aus: AuthenticationService,
+            ts: TokenStore
+    ):
         """
         Constructor.
         :param aus: authentication service to use.
@@ -43,11 +48,13 @@ class LoginCommandHandler(Logic):
             )
 
         request = BasicAuthentication(username=args[0], password=args[1])
-        match self._aus.login(request):
+        match await self._aus.login(request):
             case AuthenticateUserResponse() as response:
-                self._ts.put(user_id, response.access_token)
-                message = BotMessage(text="Success!")
-                logging.info(f"[{user_id}] <- {message}")
+                await self._ts.put(
+                    user_id, response.access_token, response.id_token
+                )
+                message = BotMessage(text="Success\\!")
+                logging.info(Event("reply", user=user_id, message=message))
                 return await bot.send_message(
                     message=message,
                     user_id=user_id)
@@ -1,21 +1,90 @@
+import itertools
 import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Sequence
 
 from adapters.handlers.error_response_handler import handle_error_response
 from adapters.handlers.utils.audio_plays import make_starring, make_written_by
 from adapters.handlers.utils.markdown import bold
+from adapters.logs import Event, sampled
 from api.audio_play_service import AudioPlayService
 from logics.bot import Bot
 from logics.logic import Logic
-from logics.message import BotButton, BotMessage
+from logics.message import BotButton, BotMessage, static
 from api.model.audio_play import AudioPlay, SearchAudioPlaysResponse
 from api.model.error_response import ErrorResponse
 
-_NOT_FOUND = BotMessage(
-    text="😇 Nothing is found. Try something else."
-)
-_INVALID_ARGUMENT = BotMessage(
-    text="😁 Query was expected as parameter."
-)
+_NOT_FOUND = static(BotMessage(
+    text="😇 Nothing is found\\. Try something else\\."
+))
+_INVALID_ARGUMENT = static(BotMessage(
+    text="😁 Query was expected as parameter\\."
+))
+_EXPIRED = static(BotMessage(
+    text="⌛ These results are outdated, please search again\\."
+))
+
+_WINDOW = 50
+_PAGE_SIZE = 5
+_MAX_SESSIONS = 10000
+
+
+@dataclass
+class _SearchSession:
+    """
+    Search results shown to user.
+    :param id: session ID, changes with every search.
+    :param audio_plays: all fetched results.
+    :param message_id: ID of the message results are shown in.
+    """
+    id: int
+    audio_plays: Sequence[AudioPlay]
+    message_id: int | None = None
+
+
+class SearchSessions:
+    """Last search results of every chat."""
+
+    def __init__(self, max_size: int = _MAX_SESSIONS):
+        """
+        Constructor.
+        :param max_size: max number of chats to remember results for.
+        """
+        self._sessions: OrderedDict[int, _SearchSession] = OrderedDict()
+        self._ids = itertools.count(1)
+        self._max_size = max_size
+
+    def start(
+            self,
+            user_id: int,
+            audio_plays: Sequence[AudioPlay]
+    ) -> _SearchSession:
+        """
+        Starts new session, replacing previous one.
+        :param user_id: ID of chat.
+        :param audio_plays: found audio plays.
+        :return: new session.
+        """
+        session = _SearchSession(next(self._ids), audio_plays)
+        self._sessions[user_id] = session
+        self._sessions.move_to_end(user_id)
+        while len(self._sessions) > self._max_size:
+            self._sessions.popitem(last=False)
+        return session
+
+    def get(self, user_id: int, session_id: int) -> _SearchSession | None:
+        """
+        Gets session.
+        :param user_id: ID of chat.
+        :param session_id: ID of session.
+        :return: session if it's still the last one of the chat.
+        """
+        session = self._sessions.get(user_id)
+        if session is None or session.id != session_id:
+            return None
+        self._sessions.move_to_end(user_id)
+        return session
 
 
 def _make_search_entry(num: int, audio_play: AudioPlay) -> str:
@@ -27,29 +96,38 @@ def _make_search_entry(num: int, audio_play: AudioPlay) -> str:
     """
     return "\n".join(
         x for x in
-        (f"{num}. {bold(audio_play.title)}",
+        (f"{num}\\. {bold(audio_play.title)}",
          make_written_by(audio_play.writers),
          make_starring(audio_play.cast))
         if x is not None
     )
 
 
-def _make_search_message(r: SearchAudioPlaysResponse) -> BotMessage:
+def _make_search_message(session: _SearchSession, page: int) -> BotMessage:
     """
-    Makes message with search result.
-    :param r: search response from API.
+    Makes message with one page of search results.
+    :param session: search session.
+    :param page: number of page, starting with zero.
     :return: message to send to user.
     """
-    if not r.audio_plays:
+    if not session.audio_plays:
         return _NOT_FOUND
 
+    start = page * _PAGE_SIZE
     text = []
     buttons = []
-    for (i, audio_play) in enumerate(r.audio_plays):
-        num = i + 1
+    for (i, audio_play) in enumerate(
+            session.audio_plays[start:start + _PAGE_SIZE]
+    ):
+        num = start + i + 1
         text.append(_make_search_entry(num, audio_play))
         buttons.append(BotButton(str(num), f"/get {audio_play.id}"))
 
+    if page > 0:
+        buttons.append(BotButton("◀️", f"/page {session.id} {page - 1}"))
+    if start + _PAGE_SIZE < len(session.audio_plays):
+        buttons.append(BotButton("▶️", f"/page {session.id} {page + 1}"))
+
     return BotMessage(
         text="\n\n".join(text),
         buttons=buttons
@@ -59,12 +137,14 @@ def _make_search_message(r: SearchAudioPlaysResponse) -> BotMessage:
 class SearchAudioPlaysHandler(Logic):
     """Searches audio plays by query found in message."""
 
-    def __init__(self, aps: AudioPlayService):
+    def __init__(self, aps: AudioPlayService, sessions: SearchSessions):
         """
         Constructor.
         :param aps: audio play service to make search calls to.
+        :param sessions: place to keep results for paging.
         """
         self._aps = aps
+        self._sessions = sessions
 
     async def process_message(
             self,
@@ -77,16 +157,67 @@ class SearchAudioPlaysHandler(Logic):
                 message=_INVALID_ARGUMENT,
                 user_id=user_id
             )
-        
-        match self._aps.search(message.text, 5):
+
+        match await self._aps.search(message.text, _WINDOW):
             case SearchAudioPlaysResponse() as response:
-                message = _make_search_message(response)
-                logging.info(f"[{user_id}] <- {message}")
-                return await bot.send_message(
+                session = self._sessions.start(user_id, response.audio_plays)
+                message = _make_search_message(session, 0)
+                if sampled("reply"):
+                    logging.info(
+                        Event("reply", user=user_id, message=message)
+                    )
+                sent = await bot.send_message(
                     message=message,
                     user_id=user_id
                 )
+                if sent:
+                    session.message_id = sent.message_id
             case ErrorResponse() as response:
                 return await handle_error_response(user_id, response, bot)
             case _:
                 return
+
+
+class SearchPageHandler(Logic):
+    """Turns pages of search results by editing their message."""
+
+    def __init__(self, sessions: SearchSessions):
+        """
+        Constructor.
+        :param sessions: place results are kept in.
+        """
+        self._sessions = sessions
+
+    async def process_message(
+            self,
+            user_id: int,
+            message: BotMessage,
+            bot: Bot
+    ) -> None:
+        try:
+            session_id, page = (int(x) for x in message.text.split())
+        except ValueError:
+            return
+
+        message_id = message.source_message_id
+        session = self._sessions.get(user_id, session_id)
+        if session is None or session.message_id is None:
+            if message_id is None:
+                return await bot.send_message(
+                    message=_EXPIRED,
+                    user_id=user_id
+                )
+            # Outdated results are replaced with the notice.
+            return await bot.edit_message(
+                message=_EXPIRED,
+                user_id=user_id,
+                message_id=message_id
+            )
+        if page < 0 or page * _PAGE_SIZE >= len(session.audio_plays):
+            return
+
+        await bot.edit_message(
+            message=_make_search_message(session, page),
+            user_id=user_id,
+            message_id=message_id or session.message_id
+        )
@@ -1,9 +1,9 @@
-from adapters.handlers.utils.markdown import code, h1
+from adapters.handlers.utils.markdown import code, escape, h1
 from logics.bot import Bot
 from logics.logic import Logic
-from logics.message import BotMessage
+from logics.message import BotMessage, static
 
-_START = BotMessage(
+_START = static(BotMessage(
     text="\n\n".join(
         x for x in (
             h1("dwtr Telegram bot"),
@@ -11,18 +11,22 @@ _START = BotMessage(
             "Helps you search audio plays, just type:\n" +
             code("/search whatever you want to find"),
 
-            "Audio plays are being searched by their title and synopsis. "
-            "So if you want to quickly find an audio play, just type "
-            "its title, but please be aware that only a small fraction "
-            "of them has been added. More will come.",
+            escape(
+                "Audio plays are being searched by their title and synopsis. "
+                "So if you want to quickly find an audio play, just type "
+                "its title, but please be aware that only a small fraction "
+                "of them has been added. More will come."
+            ),
 
-            "Right now we only store original titles and synopses. Localized "
-            "versions will be added some time later.",
+            escape(
+                "Right now we only store original titles and synopses. "
+                "Localized versions will be added some time later."
+            ),
 
             "So type to start searching:\n" + code("/search doctor who")
         )
     )
-)
+))
 
 
 class StartCommandHandler(Logic):
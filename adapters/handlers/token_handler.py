@@ -1,11 +1,12 @@
+from adapters.handlers.utils.markdown import escape
 from api.tokens import TokenStore
 from logics.bot import Bot
 from logics.logic import Logic
-from logics.message import BotMessage
+from logics.message import BotMessage, static
 
-_NOT_FOUND = BotMessage(
-    text="No token is found."
-)
+_NOT_FOUND = static(BotMessage(
+    text="No token is found\\."
+))
 
 
 class TokenCommandHandler(Logic):
@@ -24,10 +25,10 @@ class TokenCommandHandler(Logic):
             message: BotMessage,
             bot: Bot
     ) -> None:
-        token = self._ts.get(user_id)
+        token = await self._ts.get(user_id)
         if token:
             return await bot.send_message(
-                message=BotMessage(text=token),
+                message=BotMessage(text=escape(token)),
                 user_id=user_id
             )
         return await bot.send_message(
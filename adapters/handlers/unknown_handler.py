@@ -1,10 +1,10 @@
 from logics.bot import Bot
 from logics.logic import Logic
-from logics.message import BotMessage
+from logics.message import BotMessage, static
 
-_UNKNOWN_COMMAND = BotMessage(
-    text="Unknown command."
-)
+_UNKNOWN_COMMAND = static(BotMessage(
+    text="Unknown command\\."
+))
 
 
 class UnknownCommandHandler(Logic):
@@ -1,53 +1,70 @@
+_SPECIAL = str.maketrans({c: "\\" + c for c in "_*[]()~`>#+-=|{}.!\\"})
+_CODE_SPECIAL = str.maketrans({c: "\\" + c for c in "`\\"})
+_LINK_SPECIAL = str.maketrans({c: "\\" + c for c in ")\\"})
+
+
+def escape(s: str) -> str:
+    """
+    Escapes plain text, so that it's shown as is.
+    :param s: string to escape.
+    :return: MarkdownV2 text.
+    """
+    return s.translate(_SPECIAL)
+
+
 def bold(s: str) -> str:
     """
     Makes text bold.
-    :param s: string to make bold.
+    :param s: plain string to make bold.
     :rtype: str bold string.
     """
-    return "**" + s + "**"
+    return "*" + s.translate(_SPECIAL) + "*"
 
 
 def italic(s: str) -> str:
     """
     Makes string italic.
-    :param s: string to make italic.
+    :param s: plain string to make italic.
     :return: italic string.
     """
-    return "*" + s + "*"
+    return "_" + s.translate(_SPECIAL) + "_"
 
 
 def link(text: str, link_: str) -> str:
     """
     Makes link.
-    :param text: link label.
+    :param text: plain link label.
     :param link_: link itself.
     :return: link element.
     """
-    return f"[{text}]({link_})"
+    return f"[{text.translate(_SPECIAL)}]({link_.translate(_LINK_SPECIAL)})"
+
 
 def code(s: str) -> str:
     """
     Makes code line
-    :param s: string to make code line from.
+    :param s: plain string to make code line from.
     :return: code line.
     """
-    return "`" + s + "`"
+    return "`" + s.translate(_CODE_SPECIAL) + "`"
 
 
 def h1(s: str) -> str:
     """
     Makes level 1 heading
-    :param s: string to make heading from.
+    :param s: plain string to make heading from.
     :return: heading.
     """
-    return "# " + s
+    return "📌 __*" + s.translate(_SPECIAL) + "*__"
+
 
 def h2(s: str) -> str:
     """
     Makes level 2 heading
-    :param s: string to make heading from.
+    :param s: plain string to make heading from.
     :return: heading.
     """
-    return "## " + s
+    return "✏ __*" + s.translate(_SPECIAL) + "*__"
+
 
-HORIZONTAL_RULE: str = "\n***\n"
\ No newline at end of file
+HORIZONTAL_RULE: str = "\n————————\n"
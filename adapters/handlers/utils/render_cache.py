@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from logics.bot import Bot
+from logics.message import BotMessage
+
+_MAX_SIZE = 1000
+
+
+class RenderCache:
+    """
+    Messages already rendered by bot, so that building their text
+    and converting it to messenger's format is done once.
+
+    Every message is stored along with data it was made of, e.g.
+    an audio play, and is reused only while the data is equal.
+    """
+
+    def __init__(self, max_size: int = _MAX_SIZE):
+        """
+        Constructor.
+        :param max_size: max number of messages to keep.
+        """
+        self._messages: OrderedDict[Hashable, tuple[object, BotMessage]] = \
+            OrderedDict()
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def render(
+            self,
+            key: Hashable,
+            version: object,
+            make: Callable[[], BotMessage],
+            bot: Bot
+    ) -> BotMessage:
+        """
+        Gets rendered message, making and rendering it if needed.
+        :param key: key of message, e.g. audio play ID and message kind.
+        :param version: data message is made of.
+        :param make: makes message.
+        :param bot: bot to render message with.
+        :return: rendered message.
+        """
+        cached = self._messages.get(key)
+        if cached is not None:
+            cached_version, message = cached
+            if cached_version is version or cached_version == version:
+                self._messages.move_to_end(key)
+                self.hits += 1
+                return message
+
+        self.misses += 1
+        message = bot.render(make())
+        self._messages[key] = (version, message)
+        self._messages.move_to_end(key)
+        while len(self._messages) > self._max_size:
+            self._messages.popitem(last=False)
+        return message
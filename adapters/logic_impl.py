@@ -1,21 +1,28 @@
 import logging
+from typing import Sequence
 
 from adapters.handlers.get_audio_play import GetAudioPlayHandler
 from adapters.handlers.login_handler import LoginCommandHandler
-from adapters.handlers.search_audio_plays import SearchAudioPlaysHandler
+from adapters.handlers.search_audio_plays import SearchAudioPlaysHandler, \
+    SearchPageHandler, SearchSessions
 from adapters.handlers.start_handler import StartCommandHandler
 from adapters.handlers.token_handler import TokenCommandHandler
 from adapters.handlers.unknown_handler import UnknownCommandHandler
+from adapters.handlers.utils.render_cache import RenderCache
+from adapters.logs import Event, sampled
+from adapters.middleware import CommandRequest, DeduplicationMiddleware, \
+    ErrorMiddleware, Middleware, RateLimitMiddleware, TimingMiddleware, chain
 from api.authentication_service import AuthenticationService
+from api.covers import CoverStore
 from api.tokens import TokenStore
 from logics.bot import Bot
 from logics.logic import Logic
-from logics.message import BotMessage
+from logics.message import BotMessage, static
 from api.audio_play_service import AudioPlayService
 
-_INVALID_REQUEST = BotMessage(
-    text="Empty messages are not allowed."
-)
+_INVALID_REQUEST = static(BotMessage(
+    text="Empty messages are not allowed\\."
+))
 
 
 class LogicImpl(Logic):
@@ -26,62 +33,92 @@ class LogicImpl(Logic):
             aus: AuthenticationService,
             aps: AudioPlayService,
             ts: TokenStore,
+            cs: CoverStore,
+            middlewares: Sequence[Middleware] | None = None,
     ):
         """
         Constructor.
         :param aus: authentication service to use.
         :param aps: audio play service.
         :param ts: place to store tokens.
+        :param cs: place to store IDs of uploaded covers.
+        :param middlewares: steps wrapped around handling of commands,
+        the first one is the outermost. Commands are timed, errors are
+        reported, rate is limited and repeats are dropped by default.
         """
-        self._start_handler = StartCommandHandler()
-        self._login_handler = LoginCommandHandler(aus, ts)
-        self._token_handler = TokenCommandHandler(ts)
-        self._search_handler = SearchAudioPlaysHandler(aps)
-        self._get_handler = GetAudioPlayHandler(aps, ts)
+        sessions = SearchSessions()
+        self._renders = RenderCache()
+        self._handlers: dict[str, Logic] = {}
+        self.register("/start", StartCommandHandler())
+        self.register("/login", LoginCommandHandler(aus, ts))
+        self.register("/token", TokenCommandHandler(ts))
+        self.register("/search", SearchAudioPlaysHandler(aps, sessions))
+        self.register("/page", SearchPageHandler(sessions))
+        self.register("/get", GetAudioPlayHandler(
+            aps, ts, cs, renders=self._renders
+        ))
         self._unknown_handler = UnknownCommandHandler()
 
+        if middlewares is None:
+            middlewares = (
+                TimingMiddleware(),
+                ErrorMiddleware(),
+                RateLimitMiddleware(),
+                DeduplicationMiddleware(),
+            )
+        self._middlewares = tuple(middlewares)
+        self._handle = chain(self._middlewares, self._dispatch)
+
+    @property
+    def middlewares(self) -> Sequence[Middleware]:
+        """Steps wrapped around handling of commands."""
+        return self._middlewares
+
+    @property
+    def render_cache(self) -> RenderCache:
+        """Cache of rendered audio play messages."""
+        return self._renders
+
+    def register(self, command: str, handler: Logic) -> None:
+        """
+        Registers handler of command, replacing previous one.
+        :param command: command, e.g. "/get".
+        :param handler: handler of the command's arguments.
+        """
+        self._handlers[command.lower()] = handler
+
     async def process_message(
             self,
             user_id: int,
             message: BotMessage,
             bot: Bot
     ) -> None:
-        logging.info(f"[{user_id}] -> {message}")
+        if sampled("command"):
+            logging.info(Event("command", user=user_id, message=message))
         text = message.text
         if not text:
             return await bot.send_message(_INVALID_REQUEST, user_id)
 
         parts = message.text.split(maxsplit=1)
-        command = parts[0]
+        command = parts[0].lower()
         args = parts[1] if len(parts) > 1 else ""
 
-        handler = self._choose_handler(command)
-        try:
-            return await handler.process_message(
-                user_id, BotMessage(text=args), bot
-            )
-        except Exception:
-            logging.exception(
-                f"Handler {handler.__class__.__name__} threw error."
-            )
-            return None
+        await self._handle(CommandRequest(
+            user_id=user_id,
+            command=command if command in self._handlers else "unknown",
+            message=BotMessage(
+                text=args,
+                source_message_id=message.source_message_id
+            ),
+            bot=bot
+        ))
 
-    def _choose_handler(self, command: str) -> Logic:
+    async def _dispatch(self, request: CommandRequest) -> None:
         """
-        Chooses handler based on command.
-        :param command: received command.
+        Passes command to its handler.
+        :param request: command to handle.
         """
-        match command.lower():
-            case "/login":
-                return self._login_handler
-            case "/token":
-                return self._token_handler
-            case "/search":
-                return self._search_handler
-            case "/get":
-                return self._get_handler
-            case '/start':
-                return self._start_handler
-            case _:
-                return self._unknown_handler
-    
\ No newline at end of file
+        handler = self._handlers.get(request.command, self._unknown_handler)
+        await handler.process_message(
+            request.user_id, request.message, request.bot
+        )
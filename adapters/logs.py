@@ -0,0 +1,147 @@
+import atexit
+import dataclasses
+import json
+import logging
+import queue
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+_MAX_LENGTH = 200
+_MAX_ITEMS = 5
+_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+
+_sample_every = 1
+_seen: Counter[str] = Counter()
+
+
+def _truncate(s: str) -> str:
+    """
+    Shortens long string.
+    :param s: string.
+    :return: string of at most max length, with number of cut characters.
+    """
+    if len(s) <= _MAX_LENGTH:
+        return s
+    return f"{s[:_MAX_LENGTH]}…(+{len(s) - _MAX_LENGTH})"
+
+
+def _format(value: Any) -> str:
+    """
+    Formats value of field, summarizing large ones.
+    :param value: value.
+    :return: short text.
+    """
+    match value:
+        case None | bool() | int() | float():
+            return str(value)
+        case str():
+            return _truncate(value)
+        case bytes() | bytearray():
+            return f"<{len(value)} bytes>"
+        case list() | tuple():
+            items = ", ".join(_format(v) for v in value[:_MAX_ITEMS])
+            if len(value) > _MAX_ITEMS:
+                items += f", …(+{len(value) - _MAX_ITEMS})"
+            return f"[{items}]"
+        case _ if dataclasses.is_dataclass(value):
+            fields = ", ".join(
+                f"{f.name}={_format(getattr(value, f.name))}"
+                for f in dataclasses.fields(value)
+                if getattr(value, f.name) is not None
+            )
+            return f"{type(value).__name__}({fields})"
+        case _:
+            return _truncate(str(value))
+
+
+def _quote(s: str) -> str:
+    """
+    Quotes value if it can't be told apart from the rest of line.
+    :param s: formatted value.
+    :return: value as is, or in quotes.
+    """
+    if s and not any(c in s for c in " =\"\n"):
+        return s
+    return json.dumps(s, ensure_ascii=False)
+
+
+class Event:
+    """
+    Log message made of named fields.
+    Fields are formatted only when message is written, which happens
+    in background thread if logging is configured by this module, so
+    they must not be changed after logging. Large values are truncated.
+    """
+    __slots__ = ("name", "fields")
+
+    def __init__(self, name: str, /, **fields: Any):
+        """
+        Constructor.
+        :param name: what happened, e.g. "update".
+        :param fields: details of what happened.
+        """
+        self.name = name
+        self.fields = fields
+
+    def __str__(self) -> str:
+        parts = [self.name]
+        for key, value in self.fields.items():
+            parts.append(f"{key}={_quote(_format(value))}")
+        return " ".join(parts)
+
+
+def sampled(name: str) -> bool:
+    """
+    Checks whether high-volume line should be logged. The first one
+    of every configured number of lines is.
+    :param name: name of line, e.g. event name.
+    :return: `True` if line should be logged.
+    """
+    count = _seen[name]
+    _seen[name] = count + 1
+    return count % _sample_every == 0
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    Queue handler leaving records as is, so that they are formatted
+    in the listener thread rather than in the one logging.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            # Tracebacks reference frames that change after logging.
+            return super().prepare(record)
+        return record
+
+
+def configure_logging(
+        level: int | str = logging.INFO,
+        sample_every: int = 1
+) -> QueueListener:
+    """
+    Configures root logger to put records into queue and write them
+    to stderr from background thread, so that logging never blocks
+    the event loop.
+    :param level: min level of records.
+    :param sample_every: one of how many high-volume lines is logged.
+    :return: started listener, stopped at exit.
+    """
+    global _sample_every
+    _sample_every = max(1, sample_every)
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(_FORMAT))
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, handler)
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(_LazyQueueHandler(records))
+    root.setLevel(level)
+
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,354 @@
+import asyncio
+import bisect
+import logging
+import math
+import time
+from typing import Callable, Generic, Iterable, Sequence, TypeVar
+
+# Upper bounds of latency buckets in seconds.
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+_LOOP_LAG_INTERVAL = 0.5
+_LABEL_SPECIAL = str.maketrans({"\\": "\\\\", "\"": "\\\"", "\n": "\\n"})
+
+
+class Counter:
+    """Value that only goes up, e.g. number of requests."""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        """Constructor."""
+        self.value = 0
+
+    def inc(self, amount: int | float = 1) -> None:
+        """
+        Increases value.
+        :param amount: non-negative amount to add.
+        """
+        self.value += amount
+
+
+class Gauge:
+    """Value that goes up and down, e.g. queue size."""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        """Constructor."""
+        self.value = 0
+
+    def set(self, value: int | float) -> None:
+        """
+        Sets value.
+        :param value: new value.
+        """
+        self.value = value
+
+
+class Histogram:
+    """
+    Distribution of observed values, e.g. latencies.
+    Values are counted in buckets by their upper bound,
+    the last bucket counts values above all bounds.
+    """
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS):
+        """
+        Constructor.
+        :param bounds: upper bounds of buckets in ascending order.
+        """
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Records value.
+        :param value: observed value.
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+M = TypeVar("M", Counter, Gauge, Histogram)
+
+
+def _format_value(value: int | float) -> str:
+    """
+    Formats value as Prometheus expects it.
+    :param value: value to format.
+    :return: formatted value.
+    """
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """
+    Formats label set.
+    :param names: names of labels.
+    :param values: values of labels.
+    :return: label set in braces, empty string if there are no labels.
+    """
+    if not names:
+        return ""
+    pairs = ",".join(
+        f"{name}=\"{str(value).translate(_LABEL_SPECIAL)}\""
+        for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class Family(Generic[M]):
+    """
+    Metrics of one name, one per combination of label values.
+    Label values are formatted once, when their metric is created,
+    so that recording only looks metric up by a tuple.
+    """
+
+    def __init__(
+            self,
+            kind: str,
+            name: str,
+            help_: str,
+            label_names: Sequence[str],
+            make: Callable[[], M]
+    ):
+        """
+        Constructor.
+        :param kind: Prometheus type: counter, gauge or histogram.
+        :param name: metric name.
+        :param help_: description of metric.
+        :param label_names: names of labels.
+        :param make: creates metric of a new label combination.
+        """
+        self.kind = kind
+        self.name = name
+        self.help = help_
+        self.label_names = tuple(label_names)
+        self._make = make
+        self._metrics: dict[tuple[str, ...], M] = {}
+        self._labels: dict[tuple[str, ...], str] = {}
+
+    def labels(self, *values: str) -> M:
+        """
+        Gets metric of label values, creating it if needed.
+        :param values: label values in order of label names.
+        :return: metric.
+        """
+        metric = self._metrics.get(values)
+        if metric is None:
+            metric = self.bind(values, self._make())
+        return metric
+
+    def bind(self, values: tuple[str, ...], metric: M) -> M:
+        """
+        Exposes existing metric under label values, e.g. one
+        a component already records on its own.
+        :param values: label values in order of label names.
+        :param metric: metric to expose.
+        :return: the metric.
+        """
+        if len(values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels "
+                             f"{self.label_names}, got {values}.")
+        if values not in self._labels:
+            self._labels[values] = _format_labels(self.label_names, values)
+        self._metrics[values] = metric
+        return metric
+
+    def render(self) -> Iterable[str]:
+        """
+        Renders metrics in Prometheus text format.
+        :return: lines.
+        """
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for values, metric in list(self._metrics.items()):
+            labels = self._labels[values]
+            if isinstance(metric, Histogram):
+                yield from self._render_histogram(values, labels, metric)
+            else:
+                yield f"{self.name}{labels} {_format_value(metric.value)}"
+
+    def _render_histogram(
+            self,
+            values: tuple[str, ...],
+            labels: str,
+            histogram: Histogram
+    ) -> Iterable[str]:
+        """
+        Renders histogram as cumulative buckets, sum and count.
+        :param values: label values.
+        :param labels: formatted label values.
+        :param histogram: histogram to render.
+        :return: lines.
+        """
+        names = self.label_names + ("le",)
+        counts = list(histogram.counts)
+        total = 0
+        for bound, count in zip(histogram.bounds + (math.inf,), counts):
+            total += count
+            bucket = _format_labels(names, values + (_format_value(bound),))
+            yield f"{self.name}_bucket{bucket} {total}"
+        yield f"{self.name}_sum{labels} {_format_value(histogram.sum)}"
+        yield f"{self.name}_count{labels} {total}"
+
+
+class MetricsRegistry:
+    """
+    Metrics of process.
+    Most metrics are recorded as events happen. Components which keep
+    their own counters are read by collectors, which are called right
+    before metrics are rendered.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self._families: dict[str, Family] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def counter(
+            self,
+            name: str,
+            help_: str,
+            label_names: Sequence[str] = ()
+    ) -> Family[Counter]:
+        """
+        Gets family of counters, creating it if needed.
+        :param name: metric name.
+        :param help_: description of metric.
+        :param label_names: names of labels.
+        :return: family.
+        """
+        return self._family("counter", name, help_, label_names, Counter)
+
+    def gauge(
+            self,
+            name: str,
+            help_: str,
+            label_names: Sequence[str] = ()
+    ) -> Family[Gauge]:
+        """
+        Gets family of gauges, creating it if needed.
+        :param name: metric name.
+        :param help_: description of metric.
+        :param label_names: names of labels.
+        :return: family.
+        """
+        return self._family("gauge", name, help_, label_names, Gauge)
+
+    def histogram(
+            self,
+            name: str,
+            help_: str,
+            label_names: Sequence[str] = (),
+            bounds: Sequence[float] = LATENCY_BUCKETS
+    ) -> Family[Histogram]:
+        """
+        Gets family of histograms, creating it if needed.
+        :param name: metric name.
+        :param help_: description of metric.
+        :param label_names: names of labels.
+        :param bounds: upper bounds of buckets in ascending order.
+        :return: family.
+        """
+        return self._family(
+            "histogram", name, help_, label_names, lambda: Histogram(bounds)
+        )
+
+    def on_collect(self, collector: Callable[[], None]) -> None:
+        """
+        Adds collector.
+        :param collector: updates metrics from counters of a component.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Renders all metrics.
+        :return: metrics in Prometheus text format.
+        """
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                logging.exception("Metrics collector threw error.")
+        lines = []
+        for family in self._families.values():
+            lines.extend(family.render())
+        lines.append("")
+        return "\n".join(lines)
+
+    def _family(
+            self,
+            kind: str,
+            name: str,
+            help_: str,
+            label_names: Sequence[str],
+            make: Callable[[], M]
+    ) -> Family[M]:
+        """
+        Gets family, creating it if needed.
+        :param kind: Prometheus type.
+        :param name: metric name.
+        :param help_: description of metric.
+        :param label_names: names of labels.
+        :param make: creates metric of a new label combination.
+        :return: family.
+        """
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = Family(
+                kind, name, help_, label_names, make
+            )
+        elif family.kind != kind:
+            raise ValueError(f"{name} is already a {family.kind}.")
+        return family
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag, i.e. how late a sleeping task wakes up.
+    Large lag means something blocks the loop.
+    """
+
+    def __init__(
+            self,
+            histogram: Histogram,
+            interval: float = _LOOP_LAG_INTERVAL
+    ):
+        """
+        Constructor.
+        :param histogram: histogram to record lag in seconds to.
+        :param interval: seconds between measurements.
+        """
+        self._histogram = histogram
+        self._interval = interval
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """Starts measuring."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops measuring."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        """Sleeps for interval and records how late it woke up."""
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self._interval)
+            lag = time.monotonic() - start - self._interval
+            self._histogram.observe(max(lag, 0.0))
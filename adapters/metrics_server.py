@@ -0,0 +1,64 @@
+import logging
+
+from aiohttp import web
+
+from adapters.metrics import MetricsRegistry
+
+_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """
+    HTTP server exposing metrics in Prometheus text format.
+    It's meant to listen on a local address only.
+    """
+
+    def __init__(
+            self,
+            registry: MetricsRegistry,
+            listen: str = "127.0.0.1",
+            port: int = 9100,
+            path: str = "/metrics"
+    ):
+        """
+        Constructor.
+        :param registry: metrics to expose.
+        :param listen: address to listen on.
+        :param port: port to listen on.
+        :param path: URL path metrics are served at.
+        """
+        self._registry = registry
+        self._listen = listen
+        self._port = port
+        self._path = path
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        """Starts serving metrics."""
+        app = web.Application()
+        app.router.add_get(self._path, self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._listen, self._port)
+        await site.start()
+        logging.info(
+            "Serving metrics on %s:%d%s",
+            self._listen, self._port, self._path
+        )
+
+    async def stop(self) -> None:
+        """Stops serving metrics."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        """
+        Handles GET request for metrics.
+        :param request: HTTP request.
+        :return: HTTP response with metrics.
+        """
+        return web.Response(
+            body=self._registry.render().encode(),
+            headers={"Content-Type": _CONTENT_TYPE}
+        )
@@ -0,0 +1,203 @@
+import functools
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Sequence
+
+from adapters.metrics import Histogram
+from adapters.logs import Event, sampled
+from logics.bot import Bot
+from logics.message import BotMessage, static
+
+_FAILED = static(BotMessage(
+    text="😵 Something went wrong\\. Please try again later\\."
+))
+_TIMED_OUT = static(BotMessage(
+    text="🐢 Service is too slow right now\\. Please try again later\\."
+))
+_TOO_MANY_REQUESTS = static(BotMessage(
+    text="✋ Too many requests, please slow down\\."
+))
+
+_RATE = 1.0
+_BURST = 5
+_DEDUPLICATION_WINDOW = 2.0
+_MAX_USERS = 10000
+
+
+@dataclass
+class CommandRequest:
+    """
+    Command sent by user.
+    :param user_id: ID of sender.
+    :param command: lowercase command, e.g. "/get".
+    :param message: message with command arguments as text.
+    :param bot: bot who received the command.
+    """
+    user_id: int
+    command: str
+    message: BotMessage
+    bot: Bot
+
+
+Next = Callable[[CommandRequest], Awaitable[None]]
+
+
+class Middleware(ABC):
+    """Step wrapped around handling of commands."""
+
+    @abstractmethod
+    async def __call__(self, request: CommandRequest, next_: Next) -> None:
+        """
+        Handles command.
+        :param request: command to handle.
+        :param next_: the rest of the chain, not called if
+        the command should not be handled.
+        """
+        pass
+
+
+def chain(middlewares: Sequence[Middleware], handle: Next) -> Next:
+    """
+    Wraps handling of commands into middlewares.
+    :param middlewares: middlewares, the first one is the outermost.
+    :param handle: handles command after all middlewares.
+    :return: handles command with all middlewares.
+    """
+    for middleware in reversed(middlewares):
+        handle = functools.partial(middleware, next_=handle)
+    return handle
+
+
+class TimingMiddleware(Middleware):
+    """Records latency of every command."""
+
+    def __init__(self):
+        """Constructor."""
+        self._histograms: dict[str, Histogram] = {}
+
+    @property
+    def histograms(self) -> dict[str, Histogram]:
+        """Latency histograms by command."""
+        return self._histograms
+
+    async def __call__(self, request: CommandRequest, next_: Next) -> None:
+        start = time.perf_counter()
+        try:
+            await next_(request)
+        finally:
+            histogram = self._histograms.get(request.command)
+            if histogram is None:
+                histogram = self._histograms[request.command] = Histogram()
+            histogram.observe(time.perf_counter() - start)
+
+
+class ErrorMiddleware(Middleware):
+    """Logs errors of handlers and tells user something went wrong."""
+
+    async def __call__(self, request: CommandRequest, next_: Next) -> None:
+        try:
+            await next_(request)
+        except TimeoutError:
+            logging.warning(Event("timeout", command=request.command))
+            await self._reply(request, _TIMED_OUT)
+        except Exception:
+            logging.exception(Event("error", command=request.command))
+            await self._reply(request, _FAILED)
+
+    @staticmethod
+    async def _reply(request: CommandRequest, message: BotMessage) -> None:
+        """
+        Sends error message, ignoring errors of sending.
+        :param request: failed command.
+        :param message: message to send.
+        """
+        try:
+            await request.bot.send_message(message, request.user_id)
+        except Exception:
+            logging.exception("Couldn't send error message.")
+
+
+class RateLimitMiddleware(Middleware):
+    """
+    Limits rate of commands per user with token buckets. User is told
+    about the limit once, further commands are dropped silently until
+    the limit is lifted.
+    """
+
+    def __init__(self, rate: float = _RATE, burst: int = _BURST):
+        """
+        Constructor.
+        :param rate: commands allowed per second.
+        :param burst: commands allowed at once.
+        """
+        self._rate = rate
+        self._burst = burst
+        # User ID -> tokens, time of update and whether user was told.
+        self._users: OrderedDict[int, tuple[float, float, bool]] = \
+            OrderedDict()
+
+    async def __call__(self, request: CommandRequest, next_: Next) -> None:
+        now = time.monotonic()
+        tokens, updated_at, told = self._users.get(
+            request.user_id, (self._burst, now, False)
+        )
+        tokens = min(self._burst, tokens + (now - updated_at) * self._rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+            told = False
+        self._users[request.user_id] = (tokens, now, told or not allowed)
+        self._users.move_to_end(request.user_id)
+        while len(self._users) > _MAX_USERS:
+            self._users.popitem(last=False)
+
+        if allowed:
+            return await next_(request)
+        if not told:
+            await request.bot.send_message(_TOO_MANY_REQUESTS, request.user_id)
+
+
+class DeduplicationMiddleware(Middleware):
+    """
+    Remembers recent commands of every user and drops repeated ones,
+    e.g. when a button is pressed twice, since they are already
+    being answered. Commands that fail are forgotten, so they can be
+    retried.
+    """
+
+    def __init__(self, window: float = _DEDUPLICATION_WINDOW):
+        """
+        Constructor.
+        :param window: time in seconds equal commands are dropped within.
+        """
+        self._window = window
+        self._recent: OrderedDict[tuple[int, str, str], float] = \
+            OrderedDict()
+
+    async def __call__(self, request: CommandRequest, next_: Next) -> None:
+        now = time.monotonic()
+        while self._recent:
+            key, seen_at = next(iter(self._recent.items()))
+            if now - seen_at < self._window:
+                break
+            del self._recent[key]
+
+        key = (request.user_id, request.command, request.message.text)
+        if key in self._recent:
+            if sampled("repeat"):
+                logging.info(Event(
+                    "repeat", user=request.user_id, command=request.command
+                ))
+            return None
+        self._recent[key] = now
+        try:
+            await next_(request)
+        except BaseException:
+            # Failed or cancelled command wasn't answered,
+            # so it may be repeated right away.
+            if self._recent.get(key) == now:
+                del self._recent[key]
+            raise
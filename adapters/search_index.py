@@ -0,0 +1,260 @@
+import bisect
+import math
+import re
+from array import array
+from typing import Iterable
+from uuid import UUID
+
+from adapters.api.compact_catalog import CompactAudioPlay
+from api.model.audio_play import AudioPlay
+
+_TOKEN = re.compile(r"\w+")
+_K1 = 1.2
+_B = 0.75
+_MIN_PREFIX = 2
+_MAX_EXPANSIONS = 50
+
+# Weight of a term occurrence in each field.
+_TITLE = 3.0
+_SERIES = 2.0
+_WRITERS = 1.5
+_CAST = 1.0
+_SYNOPSIS = 1.0
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into lowercase terms.
+    :param text: text to split.
+    :return: terms.
+    """
+    return _TOKEN.findall(text.lower())
+
+
+def _expand(audio_play: AudioPlay | CompactAudioPlay) -> AudioPlay:
+    """
+    Decodes compact record into model.
+    :param audio_play: indexed audio play.
+    :return: audio play model.
+    """
+    if isinstance(audio_play, CompactAudioPlay):
+        return audio_play.to_model()
+    return audio_play
+
+
+def _weigh_terms(
+        audio_play: AudioPlay | CompactAudioPlay
+) -> dict[str, float]:
+    """
+    Counts weighted term frequencies of an audio play.
+    :param audio_play: audio play to count terms of.
+    :return: weighted frequency of each term.
+    """
+    fields = (
+        (_TITLE, audio_play.title),
+        (_SERIES, audio_play.series.name if audio_play.series else ""),
+        (_WRITERS, " ".join(w.name for w in audio_play.writers)),
+        (_CAST, " ".join(c.actor.name for c in audio_play.cast)),
+        (_SYNOPSIS, audio_play.synopsis),
+    )
+    weights: dict[str, float] = {}
+    for weight, text in fields:
+        for term in tokenize(text):
+            weights[term] = weights.get(term, 0.0) + weight
+    return weights
+
+
+class _Postings:
+    """
+    Documents containing a term.
+    :param docs: document numbers in ascending order.
+    :param weights: weighted term frequency in each document.
+    """
+    __slots__ = ("docs", "weights")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.weights = array("f")
+
+
+class SearchIndex:
+    """
+    In-memory inverted index of audio plays over their title, series,
+    writers, cast and synopsis, ranked with BM25.
+
+    Every query term must be found in an audio play. The last term
+    is also matched as a prefix, so results are shown while typing.
+    Reindexed audio plays get a new document number, while the old
+    one is skipped until the index is compacted.
+
+    Records of compact catalog are kept as they are and decoded into
+    models only when returned, so the index of a catalog read from
+    snapshot stays small.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self._clear()
+        self.complete = False
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def __contains__(self, audio_play_id: UUID) -> bool:
+        return audio_play_id in self._doc_of
+
+    def get(self, audio_play_id: UUID) -> AudioPlay | None:
+        """
+        Gets indexed audio play.
+        :param audio_play_id: ID of audio play.
+        :return: audio play, or None if it's not indexed.
+        """
+        doc = self._doc_of.get(audio_play_id)
+        return None if doc is None else _expand(self._docs[doc])
+
+    def add(self, audio_play: AudioPlay | CompactAudioPlay) -> None:
+        """
+        Adds audio play to index, replacing previous version.
+        :param audio_play: audio play to add.
+        """
+        old = self._doc_of.get(audio_play.id)
+        if old is not None:
+            if self._docs[old] == audio_play:
+                return
+            self._remove(old)
+
+        doc = len(self._docs)
+        weights = _weigh_terms(audio_play)
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+                self._terms_dirty = True
+            postings.docs.append(doc)
+            postings.weights.append(weight)
+
+        length = sum(weights.values())
+        self._docs.append(audio_play)
+        self._lengths.append(length)
+        self._doc_of[audio_play.id] = doc
+        self._total_length += length
+
+        if len(self._docs) > 2 * len(self._doc_of) + 1000:
+            self._compact()
+
+    def add_all(
+            self,
+            audio_plays: Iterable[AudioPlay | CompactAudioPlay]
+    ) -> None:
+        """
+        Adds several audio plays to index.
+        :param audio_plays: audio plays to add.
+        """
+        for audio_play in audio_plays:
+            self.add(audio_play)
+
+    def search(self, query: str, limit: int | None = None) -> list[AudioPlay]:
+        """
+        Searches audio plays.
+        :param query: query string.
+        :param limit: max number of results.
+        :return: found audio plays, best first.
+        """
+        terms = tokenize(query)
+        if not terms or not self._doc_of:
+            return []
+
+        scores: dict[int, float] | None = None
+        for i, term in enumerate(terms):
+            is_last = i == len(terms) - 1
+            term_scores = self._score_term(term, is_last)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    doc: score + term_scores[doc]
+                    for doc, score in scores.items()
+                    if doc in term_scores
+                }
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [_expand(self._docs[doc]) for doc, _ in ranked]
+
+    def _score_term(self, term: str, prefix: bool) -> dict[int, float]:
+        """
+        Scores documents containing term.
+        :param term: query term.
+        :param prefix: whether term is also matched as a prefix.
+        :return: BM25 score of each matching document.
+        """
+        matched = [term] if term in self._postings else []
+        if prefix and len(term) >= _MIN_PREFIX:
+            matched = self._expand(term)
+
+        n = len(self._doc_of)
+        avg_length = self._total_length / n
+        scores: dict[int, float] = {}
+        for t in matched:
+            postings = self._postings[t]
+            df = len(postings.docs)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for doc, tf in zip(postings.docs, postings.weights):
+                if self._docs[doc] is None:
+                    continue
+                norm = 1 - _B + _B * self._lengths[doc] / avg_length
+                score = idf * tf * (_K1 + 1) / (tf + _K1 * norm)
+                # A document matching several expansions
+                # is scored by the best one.
+                if score > scores.get(doc, 0.0):
+                    scores[doc] = score
+        return scores
+
+    def _expand(self, prefix: str) -> list[str]:
+        """
+        Finds indexed terms starting with prefix.
+        :param prefix: term prefix.
+        :return: matching terms, at most a fixed number of them.
+        """
+        if self._terms_dirty:
+            self._terms = sorted(self._postings)
+            self._terms_dirty = False
+        start = bisect.bisect_left(self._terms, prefix)
+        matched = []
+        for term in self._terms[start:start + _MAX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            matched.append(term)
+        return matched
+
+    def _remove(self, doc: int) -> None:
+        """
+        Marks document as removed.
+        :param doc: document number.
+        """
+        audio_play = self._docs[doc]
+        self._docs[doc] = None
+        del self._doc_of[audio_play.id]
+        self._total_length -= self._lengths[doc]
+
+    def _clear(self) -> None:
+        """Removes all documents."""
+        self._postings: dict[str, _Postings] = {}
+        self._docs: list[AudioPlay | CompactAudioPlay | None] = []
+        self._lengths = array("f")
+        self._doc_of: dict[UUID, int] = {}
+        self._total_length = 0.0
+        self._terms: list[str] = []
+        self._terms_dirty = False
+
+    def _compact(self) -> None:
+        """
+        Rebuilds index without removed documents. Whether the index
+        is complete doesn't change.
+        """
+        live = [d for d in self._docs if d is not None]
+        self._clear()
+        self.add_all(live)
@@ -0,0 +1,329 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, TypeVar
+
+from telegram.error import RetryAfter
+
+from adapters.logs import Event, sampled
+from adapters.metrics import Histogram
+from logics.bot import Priority
+
+T = TypeVar("T")
+
+_RATE = 30.0
+_CHAT_RATE = 1.0
+_CHAT_BURST = 3
+_GROUP_RATE = 20 / 60
+_MAX_RETRIES = 5
+_MAX_CHATS = 10000
+_SLOW_QUEUE = 1.0
+
+
+class _Bucket:
+    """
+    Token bucket.
+    :param rate: tokens added per second.
+    :param capacity: max number of tokens.
+    """
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def wait_time(self, now: float) -> float:
+        """
+        Gets time to wait for a token.
+        :param now: monotonic time.
+        :return: seconds until a token is available, zero if it is now.
+        """
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.rate
+        )
+        self.updated_at = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Takes a token, must be called only if it's available."""
+        self.tokens -= 1
+
+
+@dataclass(order=True)
+class _Job:
+    """
+    Send waiting in queue.
+    :param priority: priority, lower is sent first.
+    :param seq: number of submission, keeps order within priority.
+    :param chat_id: ID of chat message is sent to.
+    :param send: makes the request.
+    :param future: result of the request.
+    :param submitted_at: monotonic time of submission.
+    :param attempts: number of attempts made.
+    """
+    priority: int
+    seq: int
+    chat_id: int = field(compare=False)
+    send: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    submitted_at: float = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+@dataclass
+class SendStats:
+    """
+    Counters of send scheduler.
+    :param sent: number of successful sends.
+    :param failed: number of sends failed with error.
+    :param throttled: number of responses asking to retry later.
+    :param queue_latency: moving average of time in queue in seconds.
+    :param max_queue_latency: max time in queue in seconds.
+    """
+    sent: int = 0
+    failed: int = 0
+    throttled: int = 0
+    queue_latency: float = 0.0
+    max_queue_latency: float = 0.0
+
+
+class SendScheduler:
+    """
+    Paces requests sending messages to chats, so that messenger
+    limits are not hit under bursts.
+
+    Requests are taken from a priority queue, interactive replies
+    before background sends, and made when both the global token
+    bucket and the bucket of the chat have a token. Group chats are
+    paced slower than private ones. If messenger asks to retry later,
+    all sends are paused for the given time and the request is put
+    back in queue.
+    """
+
+    def __init__(
+            self,
+            rate: float = _RATE,
+            chat_rate: float = _CHAT_RATE,
+            chat_burst: int = _CHAT_BURST,
+            group_rate: float = _GROUP_RATE,
+            max_retries: int = _MAX_RETRIES
+    ):
+        """
+        Constructor.
+        :param rate: max number of sends per second in total.
+        :param chat_rate: max number of sends per second to a chat.
+        :param chat_burst: number of sends to a chat made without pacing.
+        :param group_rate: max number of sends per second to a group.
+        :param max_retries: max number of retries of a request.
+        """
+        self._rate = rate
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._group_rate = group_rate
+        self._max_retries = max_retries
+        self._bucket = _Bucket(rate, rate, time.monotonic())
+        self._chats: dict[int, _Bucket] = {}
+        self._queue: list[_Job] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._sending: set[asyncio.Task] = set()
+        self._stats = SendStats()
+        self._latency = Histogram()
+
+    @property
+    def stats(self) -> SendStats:
+        """Counters of sends."""
+        return self._stats
+
+    @property
+    def latency(self) -> Histogram:
+        """Durations of requests in seconds, excluding time in queue."""
+        return self._latency
+
+    @property
+    def pending(self) -> int:
+        """Number of requests waiting in queue."""
+        return len(self._queue)
+
+    async def submit(
+            self,
+            chat_id: int,
+            send: Callable[[], Awaitable[T]],
+            priority: Priority = Priority.INTERACTIVE
+    ) -> T:
+        """
+        Queues request and waits for its result.
+        :param chat_id: ID of chat message is sent to.
+        :param send: makes the request.
+        :param priority: priority of the request.
+        :return: result of the request.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._push(_Job(
+            priority, next(self._seq), chat_id, send, future,
+            time.monotonic()
+        ))
+        return await future
+
+    async def close(self) -> None:
+        """Stops sending, requests left in queue are cancelled."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for job in self._queue:
+            job.future.cancel()
+        self._queue.clear()
+
+    def _push(self, job: _Job) -> None:
+        """Puts job in queue and wakes up sending loop."""
+        heapq.heappush(self._queue, job)
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        """Takes jobs from queue and starts them when allowed."""
+        while True:
+            if not self._queue:
+                await self._sleep(None)
+                continue
+
+            now = time.monotonic()
+            wait = max(self._paused_until - now, self._bucket.wait_time(now))
+            if wait > 0:
+                await self._sleep(wait)
+                continue
+
+            job, wait = self._pop_ready(now)
+            if job is None:
+                await self._sleep(wait if self._queue else None)
+                continue
+
+            self._bucket.take()
+            self._chat_bucket(job.chat_id, now).take()
+            if job.attempts == 0:
+                self._record_latency(now - job.submitted_at)
+            task = asyncio.create_task(self._send(job))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _sleep(self, timeout: float | None) -> None:
+        """
+        Waits until timeout passes or new job is queued.
+        :param timeout: time in seconds, None to wait for new job only.
+        """
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except TimeoutError:
+            pass
+
+    def _pop_ready(self, now: float) -> tuple[_Job | None, float]:
+        """
+        Takes the first job whose chat may be sent to now.
+        :param now: monotonic time.
+        :return: job, or None and time to wait for a chat to be ready.
+        """
+        skipped = []
+        found = None
+        wait = float("inf")
+        while self._queue:
+            job = heapq.heappop(self._queue)
+            if job.future.done():
+                # Caller gave up waiting.
+                continue
+            chat_wait = self._chat_bucket(job.chat_id, now).wait_time(now)
+            if chat_wait == 0:
+                found = job
+                break
+            skipped.append(job)
+            wait = min(wait, chat_wait)
+        for job in skipped:
+            heapq.heappush(self._queue, job)
+        return found, wait
+
+    def _chat_bucket(self, chat_id: int, now: float) -> _Bucket:
+        """
+        Gets token bucket of chat.
+        :param chat_id: ID of chat, negative for groups.
+        :param now: monotonic time.
+        :return: bucket.
+        """
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= _MAX_CHATS:
+                self._forget_idle_chats(now)
+            rate = self._group_rate if chat_id < 0 else self._chat_rate
+            bucket = self._chats[chat_id] = _Bucket(
+                rate, self._chat_burst, now
+            )
+        return bucket
+
+    def _forget_idle_chats(self, now: float) -> None:
+        """
+        Removes buckets of chats that are full again.
+        :param now: monotonic time.
+        """
+        for chat_id, bucket in list(self._chats.items()):
+            bucket.wait_time(now)
+            if bucket.tokens >= bucket.capacity:
+                del self._chats[chat_id]
+
+    async def _send(self, job: _Job) -> None:
+        """
+        Makes request of job, putting it back in queue if asked to.
+        :param job: job to run.
+        """
+        start = time.perf_counter()
+        try:
+            result = await job.send()
+        except RetryAfter as e:
+            self._latency.observe(time.perf_counter() - start)
+            self._stats.throttled += 1
+            retry_after = e.retry_after
+            if isinstance(retry_after, timedelta):
+                retry_after = retry_after.total_seconds()
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + retry_after
+            )
+            logging.warning(Event("throttled", pause=retry_after))
+            if job.attempts < self._max_retries and not job.future.done():
+                job.attempts += 1
+                self._push(job)
+                return
+            self._stats.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        except Exception as e:
+            self._latency.observe(time.perf_counter() - start)
+            self._stats.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self._latency.observe(time.perf_counter() - start)
+            self._stats.sent += 1
+            if not job.future.done():
+                job.future.set_result(result)
+
+    def _record_latency(self, latency: float) -> None:
+        """
+        Records time a job spent in queue.
+        :param latency: time in seconds.
+        """
+        stats = self._stats
+        stats.queue_latency += (latency - stats.queue_latency) * 0.1
+        if latency > stats.max_queue_latency:
+            stats.max_queue_latency = latency
+        if latency > _SLOW_QUEUE and sampled("slow_queue"):
+            logging.warning(Event(
+                "slow_queue", latency=latency, waiting=len(self._queue)
+            ))
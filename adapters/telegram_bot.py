@@ -1,18 +1,42 @@
+import asyncio
 import logging
+import signal
 
+from functools import partial
 from math import sqrt
+from typing import Awaitable, Callable, Sequence, TYPE_CHECKING
 
-from black.ranges import Sequence
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, \
+    InlineQueryResultArticle, InputTextMessageContent, Update
 from telegram.ext import Application, CallbackQueryHandler, ContextTypes, \
-    MessageHandler, filters
-from telegramify_markdown import standardize, markdownify
+    InlineQueryHandler, MessageHandler, filters
+from telegram.error import BadRequest, TelegramError
+from telegramify_markdown import standardize
 
-from logics.message import BotButton, BotMessage
+from adapters.chat_update_processor import ChatOrderedUpdateProcessor
+from adapters.logs import Event, sampled
+from adapters.send_scheduler import SendScheduler
+from adapters.update_policy import UpdatePolicy
+from logics.bot import ImageRejectedError, Priority
+from logics.inline import InlineLogic, InlineResult
+from logics.message import BotButton, BotMessage, SentMessage, \
+    static_messages
 from logics.logic import Logic
 import logics
 
+if TYPE_CHECKING:
+    from adapters.webhook_server import WebhookConfig
+
+# Errors about images Telegram can't get by ID or link.
+_IMAGE_ERRORS = (
+    "wrong file identifier",
+    "wrong remote file identifier",
+    "failed to get http url content",
+    "wrong type of the web page content",
+)
+_NOT_MODIFIED = "message is not modified"
 _PARSE_MODE = "MarkdownV2"
+_UPDATE_QUEUE_SIZE = 1000
 
 
 def _create_button(button: BotButton) -> InlineKeyboardButton:
@@ -27,6 +51,24 @@ def _create_button(button: BotButton) -> InlineKeyboardButton:
     )
 
 
+def _create_inline_result(result: InlineResult) -> InlineQueryResultArticle:
+    """
+    Converts abstract inline result to Telegram one.
+    :param result: result to convert.
+    :return: Telegram inline result.
+    """
+    return InlineQueryResultArticle(
+        id=result.id,
+        title=result.title,
+        input_message_content=InputTextMessageContent(
+            result.message.text,
+            parse_mode=_PARSE_MODE,
+        ),
+        description=result.description,
+        thumbnail_url=result.thumbnail,
+    )
+
+
 def _create_button_grid(buttons: Sequence[BotButton]) -> InlineKeyboardMarkup:
     """
     Makes Telegram button grid from given buttons.
@@ -45,52 +87,279 @@ def _create_button_grid(buttons: Sequence[BotButton]) -> InlineKeyboardMarkup:
 class TelegramBot(logics.bot.Bot):
     """Telegram bot that reroutes all text messages to given logic."""
 
-    def __init__(self, name: str, token: str, logic: Logic):
+    def __init__(
+            self,
+            name: str,
+            token: str,
+            logic: Logic,
+            workers: int | None = None,
+            webhook: "WebhookConfig | None" = None,
+            queue_size: int = _UPDATE_QUEUE_SIZE,
+            inline_logic: InlineLogic | None = None,
+            scheduler: SendScheduler | None = None,
+    ):
         """
         Constructor.
         :param name: bot name.
         :param token: bot token.
         :param logic: logic to which messages will be passed.
+        :param workers: number of updates processed concurrently, updates
+        from the same chat are still processed in order. Updates are
+        processed one by one if not given.
+        :param webhook: webhook configuration, updates are received
+        via polling if not given.
+        :param queue_size: max number of received updates waiting to be
+        processed, unbounded if zero.
+        :param inline_logic: logic to which inline queries will be passed,
+        inline mode is not supported if not given.
+        :param scheduler: scheduler pacing sent messages.
         """
         self._name = name
         self._token = token
         self._logic = logic
-        self._application = Application.builder().token(self._token).build()
-        handler = MessageHandler(filters.ALL, self._send_to_logic)
-        self._application.add_handler(handler)
-        callback_handler = CallbackQueryHandler(self._send_to_logic)
-        self._application.add_handler(callback_handler)
+        self._inline_logic = inline_logic
+        self._webhook = webhook
+        self._scheduler = scheduler or SendScheduler()
+        builder = Application.builder().token(self._token)
+        builder.update_queue(asyncio.Queue(maxsize=queue_size))
+        builder.post_init(self._post_init)
+        builder.post_stop(self._post_stop)
+        self._on_start: list[Callable[[], Awaitable[None]]] = []
+        self._on_stop: list[Callable[[], Awaitable[None]]] = []
+        self._update_processor: ChatOrderedUpdateProcessor | None = None
+        if workers and workers > 1:
+            self._update_processor = ChatOrderedUpdateProcessor(workers)
+            builder.concurrent_updates(self._update_processor)
+        self._application = builder.build()
+        self._policy = UpdatePolicy()
+        self._policy.add(Update.MESSAGE, MessageHandler(
+            filters.UpdateType.MESSAGE & filters.TEXT,
+            self._send_to_logic
+        ))
+        self._policy.add(
+            Update.CALLBACK_QUERY,
+            CallbackQueryHandler(self._send_to_logic)
+        )
+        if inline_logic:
+            # Inline queries are not ordered, so they don't hold
+            # the chat worker while waiting for the next keystroke.
+            self._policy.add(Update.INLINE_QUERY, InlineQueryHandler(
+                self._answer_inline_query,
+                block=False
+            ))
+        self._policy.install(self._application)
+        self._static = {id(m): self._render(m) for m in static_messages()}
 
-    async def send_message(self, message: BotMessage, user_id: int) -> None:
+    def render(self, message: BotMessage) -> BotMessage:
+        if message.rendered:
+            return message
+        return self._static.get(id(message)) or self._render(message)
+
+    @staticmethod
+    def _render(message: BotMessage) -> BotMessage:
+        """
+        Converts message buttons to keyboard, text is already
+        written in MarkdownV2.
+        :param message: message to render.
+        :return: rendered message.
+        """
         buttons = message.buttons
+        return BotMessage(
+            text=message.text,
+            image=message.image,
+            buttons=buttons,
+            rendered=True,
+            layout=_create_button_grid(buttons) if buttons else None
+        )
 
-        reformatted_text: str | None = None
-        if message.text:
-            reformatted_text = markdownify(
-                message.text,
-                max_line_length=None,
-                normalize_whitespace=False
-            )
+    async def send_message(
+            self,
+            message: BotMessage,
+            user_id: int,
+            priority: Priority = Priority.INTERACTIVE
+    ) -> SentMessage | None:
+        message = self.render(message)
+        bot = self._application.bot
 
         if message.image:
-            return await self._application.bot.send_photo(
+            request = partial(
+                bot.send_photo,
                 chat_id=user_id,
                 photo=message.image,
-                caption=reformatted_text,
+                caption=message.text,
                 parse_mode=_PARSE_MODE,
-                reply_markup=_create_button_grid(buttons) if buttons else None
+                reply_markup=message.layout
+            )
+            try:
+                sent = await self._scheduler.submit(
+                    user_id, request, priority
+                )
+            except BadRequest as e:
+                if isinstance(message.image, str) and any(
+                        m in e.message.lower() for m in _IMAGE_ERRORS):
+                    raise ImageRejectedError(e.message) from e
+                raise
+            return SentMessage(
+                message_id=sent.message_id,
+                image_id=sent.photo[-1].file_id if sent.photo else None
             )
 
-        return await self._application.bot.send_message(
+        request = partial(
+            bot.send_message,
             chat_id=user_id,
-            text=reformatted_text,
+            text=message.text,
             parse_mode=_PARSE_MODE,
-            reply_markup=_create_button_grid(buttons) if buttons else None
+            reply_markup=message.layout
         )
+        sent = await self._scheduler.submit(user_id, request, priority)
+        return SentMessage(message_id=sent.message_id)
+
+    async def edit_message(
+            self,
+            message: BotMessage,
+            user_id: int,
+            message_id: int,
+            priority: Priority = Priority.INTERACTIVE
+    ) -> SentMessage | None:
+        message = self.render(message)
+        bot = self._application.bot
+
+        if message.image:
+            request = partial(
+                bot.edit_message_caption,
+                chat_id=user_id,
+                message_id=message_id,
+                caption=message.text,
+                parse_mode=_PARSE_MODE,
+                reply_markup=message.layout
+            )
+        else:
+            request = partial(
+                bot.edit_message_text,
+                chat_id=user_id,
+                message_id=message_id,
+                text=message.text,
+                parse_mode=_PARSE_MODE,
+                reply_markup=message.layout
+            )
+        try:
+            await self._scheduler.submit(user_id, request, priority)
+        except BadRequest as e:
+            # Message already has the content, e.g. a button
+            # was pressed twice.
+            if _NOT_MODIFIED not in e.message.lower():
+                raise
+        return SentMessage(message_id=message_id)
+
+    @property
+    def update_processor(self) -> ChatOrderedUpdateProcessor | None:
+        """Concurrent update processor, None if updates are sequential."""
+        return self._update_processor
+
+    @property
+    def update_policy(self) -> UpdatePolicy:
+        """Handled update types and counters of discarded updates."""
+        return self._policy
+
+    @property
+    def send_scheduler(self) -> SendScheduler:
+        """Scheduler pacing sent messages."""
+        return self._scheduler
+
+    def on_start(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """
+        Adds callback awaited before updates are received,
+        e.g. to warm caches or start background jobs.
+        :param callback: callback to await.
+        """
+        self._on_start.append(callback)
+
+    def on_stop(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """
+        Adds callback awaited when the bot stops.
+        :param callback: callback to await.
+        """
+        self._on_stop.append(callback)
 
     def start(self) -> None:
         """Start the bot."""
-        self._application.run_polling(allowed_updates=Update.ALL_TYPES)
+        if self._webhook is None:
+            self._application.run_polling(
+                allowed_updates=self._policy.allowed_updates
+            )
+        else:
+            asyncio.run(self._run_webhook(self._webhook))
+
+    async def _run_webhook(self, config: "WebhookConfig") -> None:
+        """
+        Runs the bot receiving updates via webhook until interrupted.
+        :param config: webhook configuration.
+        """
+        from adapters.webhook_server import WebhookServer
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        server = WebhookServer(config, self._application, self._policy)
+        async with self._application:
+            await self._post_init(self._application)
+            await self._application.start()
+            if config.url:
+                await self._application.bot.set_webhook(
+                    url=config.url,
+                    secret_token=config.secret_token,
+                    allowed_updates=self._policy.allowed_updates,
+                )
+            await server.start()
+            try:
+                await stop.wait()
+            finally:
+                await server.stop()
+                await self._application.stop()
+                await self._post_stop(self._application)
+
+    async def _post_init(self, application: Application) -> None:
+        """
+        Awaits start callbacks.
+        :param application: initialized application.
+        """
+        for callback in self._on_start:
+            await callback()
+
+    async def _post_stop(self, application: Application) -> None:
+        """
+        Awaits stop callbacks.
+        :param application: stopped application.
+        """
+        for callback in self._on_stop:
+            await callback()
+        await self._scheduler.close()
+
+    async def _answer_inline_query(
+            self,
+            update: Update,
+            context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """Passes inline query to the inline logic and answers it.
+        :param update: update received from Telegram.
+        :param context: some context.
+        """
+        query = update.inline_query
+        page = await self._inline_logic.process_inline_query(
+            user_id=query.from_user.id,
+            query=query.query,
+            offset=query.offset,
+        )
+        if page is None:
+            return None
+        await query.answer(
+            results=[_create_inline_result(r) for r in page.results],
+            next_offset=page.next_offset,
+            cache_time=page.cache_time,
+        )
+        return None
 
     async def _send_to_logic(self, update: Update,
                              context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -100,15 +369,26 @@ class TelegramBot(logics.bot.Bot):
         """
         chat_id: int
         text: str | None
+        source_message_id: int | None = None
+        answer: asyncio.Task | None = None
 
         if update.callback_query:
-            text = update.callback_query.data
-            chat_id = update.callback_query.message.chat.id
-            logging.info(f"[{chat_id}] callback: {update.callback_query}")
+            query = update.callback_query
+            # Query is answered right away, so that client stops showing
+            # progress while the logic is still working.
+            answer = asyncio.create_task(query.answer())
+            if query.message is None or not query.data:
+                return await self._await_answer(answer)
+            text = query.data
+            chat_id = query.message.chat.id
+            source_message_id = query.message.message_id
+            if sampled("callback"):
+                logging.info(Event("callback", chat=chat_id, data=text))
         elif update.message and update.message.text:
             text = standardize(update.message.text)
             chat_id = update.message.chat_id
-            logging.info(f"[{chat_id}] text: {update.message}")
+            if sampled("text"):
+                logging.info(Event("text", chat=chat_id, text=text))
         else:
             return None
 
@@ -117,10 +397,28 @@ class TelegramBot(logics.bot.Bot):
         tagless_command = command.replace("@" + self._name, "")
         tagless_text = " ".join([tagless_command, *parts[1:]])
 
-        message = BotMessage(text=tagless_text)
-        await self._logic.process_message(
-            user_id=chat_id,
-            message=message,
-            bot=self,
+        message = BotMessage(
+            text=tagless_text,
+            source_message_id=source_message_id
         )
+        try:
+            await self._logic.process_message(
+                user_id=chat_id,
+                message=message,
+                bot=self,
+            )
+        finally:
+            if answer:
+                await self._await_answer(answer)
         return None
+
+    @staticmethod
+    async def _await_answer(answer: asyncio.Task) -> None:
+        """
+        Waits for callback query to be answered.
+        :param answer: task answering the query.
+        """
+        try:
+            await answer
+        except TelegramError:
+            logging.warning("Couldn't answer callback query.", exc_info=True)
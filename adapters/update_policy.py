@@ -0,0 +1,109 @@
+from collections import Counter
+
+from telegram import Update
+from telegram.ext import Application, BaseHandler, ContextTypes, TypeHandler
+
+
+def _update_type(update: Update) -> str:
+    """
+    Gets type of update, i.e. name of its filled field.
+    :param update: received update.
+    :return: update type.
+    """
+    for update_type in Update.ALL_TYPES:
+        if getattr(update, update_type, None) is not None:
+            return update_type
+    return "unknown"
+
+
+class UpdatePolicy:
+    """
+    Set of handlers along with the update types they consume.
+    Only those types are requested from Telegram. Updates reaching
+    handlers are counted as received, and those that none of the
+    handlers accepted are counted as discarded.
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self._handlers: list[BaseHandler] = []
+        self._types: list[str] = []
+        self._received: Counter[str] = Counter()
+        self._discarded: Counter[str] = Counter()
+
+    @property
+    def allowed_updates(self) -> list[str]:
+        """Update types to request from Telegram."""
+        return list(self._types)
+
+    @property
+    def received(self) -> dict[str, int]:
+        """Numbers of received updates by type."""
+        return dict(self._received)
+
+    @property
+    def discarded(self) -> dict[str, int]:
+        """Numbers of received but discarded updates by type."""
+        return dict(self._discarded)
+
+    def add(self, update_type: str, handler: BaseHandler) -> None:
+        """
+        Adds handler.
+        :param update_type: type of updates handler consumes,
+        one of `Update.ALL_TYPES`.
+        :param handler: handler to add.
+        """
+        self._handlers.append(handler)
+        if update_type not in self._types:
+            self._types.append(update_type)
+
+    def accepts(self, update_type: str) -> bool:
+        """
+        Checks whether updates of given type are handled.
+        :param update_type: type of update.
+        :return: `True` if handled.
+        """
+        return update_type in self._types
+
+    def count_discarded(self, update_type: str) -> None:
+        """
+        Counts update that was discarded before dispatch.
+        :param update_type: type of discarded update.
+        """
+        self._discarded[str(update_type)] += 1
+
+    def install(self, application: Application) -> None:
+        """
+        Adds all handlers to an application, preceded by one counting
+        received updates and followed by one counting updates that were
+        not handled.
+        :param application: application to add handlers to.
+        """
+        application.add_handler(TypeHandler(Update, self._receive), -1)
+        for handler in self._handlers:
+            application.add_handler(handler)
+        application.add_handler(TypeHandler(Update, self._discard))
+
+    async def _receive(
+            self,
+            update: Update,
+            context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """
+        Counts received update.
+        :param update: received update.
+        :param context: some context.
+        """
+        self._received[_update_type(update)] += 1
+
+    async def _discard(
+            self,
+            update: Update,
+            context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """
+        Counts discarded update.
+        :param update: discarded update.
+        :param context: some context.
+        """
+        self.count_discarded(_update_type(update))
@@ -0,0 +1,151 @@
+import asyncio
+import hmac
+import ipaddress
+import logging
+from dataclasses import dataclass
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from adapters.logs import Event, sampled
+from adapters.update_policy import UpdatePolicy
+
+_SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def _is_loopback(address: str) -> bool:
+    """
+    Checks whether address is only reachable from this host.
+    :param address: host name or IP address.
+    :return: `True` if address is a loopback one.
+    """
+    if address == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(address).is_loopback
+    except ValueError:
+        return False
+
+
+@dataclass
+class WebhookConfig:
+    """
+    Webhook mode configuration.
+    :param listen: address to listen on.
+    :param port: port to listen on.
+    :param path: URL path updates are posted to.
+    :param secret_token: token Telegram sends with every update,
+    required if URL is given or server listens on a non-loopback
+    address.
+    :param url: public URL to register in Telegram, webhook is not
+    registered if not given, e.g. when updates are posted locally.
+    """
+    listen: str = "127.0.0.1"
+    port: int = 8443
+    path: str = "/telegram"
+    secret_token: str | None = None
+    url: str | None = None
+
+    def __post_init__(self):
+        if self.secret_token:
+            return
+        if self.url or not _is_loopback(self.listen):
+            # Webhook may be registered elsewhere, e.g. by another
+            # replica, so a reachable server is public either way.
+            raise ValueError(
+                "Secret token is required for webhook reachable "
+                "from other hosts, otherwise anyone could post updates."
+            )
+
+
+class WebhookServer:
+    """
+    HTTP server receiving updates from Telegram.
+    Received updates are put into the application update queue. If the
+    queue is full, update is rejected, so that Telegram retries it later.
+    Updates of types no handler consumes are dropped before
+    deserialization.
+    """
+
+    def __init__(
+            self,
+            config: WebhookConfig,
+            application: Application,
+            policy: UpdatePolicy
+    ):
+        """
+        Constructor.
+        :param config: webhook configuration.
+        :param application: application to feed updates to.
+        :param policy: policy to filter updates with.
+        """
+        self._config = config
+        self._application = application
+        self._policy = policy
+        self._runner: web.AppRunner | None = None
+
+    async def start(self) -> None:
+        """Starts listening for updates."""
+        app = web.Application()
+        app.router.add_post(self._config.path, self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(
+            self._runner,
+            self._config.listen,
+            self._config.port
+        )
+        await site.start()
+        logging.info(
+            "Listening for updates on %s:%d%s",
+            self._config.listen, self._config.port, self._config.path
+        )
+
+    async def stop(self) -> None:
+        """Stops listening for updates."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        """
+        Handles POST request with update.
+        :param request: HTTP request.
+        :return: HTTP response.
+        """
+        if not self._is_authorized(request):
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            update_type = next(
+                (t for t in Update.ALL_TYPES if t in data), "unknown"
+            )
+            if not self._policy.accepts(update_type):
+                self._policy.count_discarded(update_type)
+                return web.Response()
+            update = Update.de_json(data, self._application.bot)
+        except Exception:
+            logging.warning("Received malformed update.")
+            return web.Response(status=400)
+
+        try:
+            self._application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            if sampled("queue_full"):
+                logging.warning(Event("queue_full", update=update.update_id))
+            return web.Response(status=503)
+        return web.Response()
+
+    def _is_authorized(self, request: web.Request) -> bool:
+        """
+        Checks secret token of request.
+        :param request: HTTP request.
+        :return: `True` if token matches or no token is configured.
+        """
+        expected = self._config.secret_token
+        if not expected:
+            return True
+        received = request.headers.get(_SECRET_HEADER, "")
+        return hmac.compare_digest(received.encode(), expected.encode())
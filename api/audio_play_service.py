@@ -3,7 +3,7 @@ from abc import ABC, abstractmethod
 from uuid import UUID
 
 from api.model.audio_play import AudioPlay, AudioPlayLocation, \
-    SearchAudioPlaysResponse
+    ListAudioPlaysResponse, SearchAudioPlaysResponse
 from api.model.error_response import ErrorResponse
 
 
@@ -11,7 +11,10 @@ class AudioPlayService(ABC):
     """Wrapper of audio play service API."""
 
     @abstractmethod
-    def get(self, audio_play_id: UUID) -> AudioPlay | ErrorResponse | None:
+    async def get(
+            self,
+            audio_play_id: UUID
+    ) -> AudioPlay | ErrorResponse | None:
         """
         Gets audio play by ID.
         :param audio_play_id: ID of an audio play.
@@ -21,7 +24,7 @@ class AudioPlayService(ABC):
         pass
 
     @abstractmethod
-    def search(
+    async def search(
             self,
             query: str,
             limit: int | None = None
@@ -36,7 +39,25 @@ class AudioPlayService(ABC):
         pass
 
     @abstractmethod
-    def get_location(
+    async def list(
+            self,
+            page_size: int,
+            page_token: str | None = None,
+            sync_token: str | None = None
+    ) -> ListAudioPlaysResponse | ErrorResponse | None:
+        """
+        Lists page of audio plays catalog.
+        :param page_size: max number of audio plays on page.
+        :param page_token: token of requested page, None for the first one.
+        :param sync_token: token given on the last page of previous
+        listing, only audio plays changed since are listed if given.
+        :return: page if success, error response
+        from API, or None when couldn't get response.
+        """
+        pass
+
+    @abstractmethod
+    async def get_location(
             self,
             token: str,
             audio_play_id: UUID
@@ -49,3 +70,12 @@ class AudioPlayService(ABC):
         from API, or None when couldn't get response.
         """
         pass
+
+    @abstractmethod
+    async def get_cover(self, cover_uri: str) -> bytes | None:
+        """
+        Downloads cover of an audio play.
+        :param cover_uri: URI of the cover.
+        :return: cover as bytes if success, otherwise None.
+        """
+        pass
@@ -9,7 +9,7 @@ class AuthenticationService(ABC):
     """Wrapper of authentication service API."""
 
     @abstractmethod
-    def login(
+    async def login(
             self,
             request: AuthenticateUserRequest
     ) -> AuthenticateUserResponse | ErrorResponse | None:
@@ -22,7 +22,7 @@ class AuthenticationService(ABC):
         pass
 
     @abstractmethod
-    def register(
+    async def register(
             self,
             request: CreateUserRequest,
     ) -> AuthenticateUserResponse | ErrorResponse | None:
@@ -0,0 +1,35 @@
+from abc import ABC, abstractmethod
+
+from uuid import UUID
+
+
+class CoverStore(ABC):
+    """Storage for IDs of covers already uploaded to messenger."""
+
+    @abstractmethod
+    def get(self, audio_play_id: UUID, cover_uri: str) -> str | None:
+        """
+        Gets stored ID of uploaded cover.
+        :param audio_play_id: ID of an audio play.
+        :param cover_uri: URI of the cover.
+        :return: ID of uploaded cover if found.
+        """
+        pass
+
+    @abstractmethod
+    def put(self, audio_play_id: UUID, cover_uri: str, file_id: str) -> None:
+        """
+        Puts ID of uploaded cover.
+        :param audio_play_id: ID of an audio play.
+        :param cover_uri: URI of the cover.
+        :param file_id: ID of uploaded cover.
+        """
+        pass
+
+    @abstractmethod
+    def forget(self, audio_play_id: UUID) -> None:
+        """
+        Removes IDs of all uploaded covers of an audio play.
+        :param audio_play_id: ID of an audio play.
+        """
+        pass
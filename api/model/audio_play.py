@@ -98,6 +98,19 @@ class SearchAudioPlaysResponse(BaseModel):
     audio_plays: list[AudioPlay]
 
 
+class ListAudioPlaysResponse(BaseModel):
+    """
+    Page of audio plays catalog.
+    :param audio_plays: audio plays on this page.
+    :param next_page_token: token of the next page, None on the last one.
+    :param sync_token: token to list only audio plays changed since,
+    given on the last page.
+    """
+    audio_plays: list[AudioPlay]
+    next_page_token: str | None = None
+    sync_token: str | None = None
+
+
 class AudioPlayLocation(BaseModel):
     """Self-hosted location of an audio play."""
     uri: str
@@ -42,6 +42,22 @@ class OAuth2Authentication(BaseModel):
         return json.dumps(self.model_dump(*args, **kwargs))
 
 
+class IdTokenAuthentication(BaseModel):
+    """
+    Authentication request via previously issued ID token,
+    used to renew access token.
+    :param id_token: ID token.
+    """
+    id_token: str
+
+    def model_dump(self, *args, **kwargs) -> dict:
+        return {"id_token": super().model_dump(*args, **kwargs)}
+
+    def model_dump_json(self, *args, **kwargs) -> str:
+        import json
+        return json.dumps(self.model_dump(*args, **kwargs))
+
+
 class AuthenticateUserResponse(BaseModel):
     """
     Positive authentication response.
@@ -62,4 +78,5 @@ class CreateUserRequest(BaseModel):
     oauth2: OAuth2Authentication
 
 
-AuthenticateUserRequest = BasicAuthentication | OAuth2Authentication
+AuthenticateUserRequest = BasicAuthentication | OAuth2Authentication \
+                          | IdTokenAuthentication
@@ -1,11 +1,24 @@
 from abc import ABC, abstractmethod
+from typing import NamedTuple
+
+
+class RenewableToken(NamedTuple):
+    """
+    Stored token along with what is needed to renew it.
+    :param user_id: user ID.
+    :param access_token: access token.
+    :param id_token: ID token to renew access token with.
+    """
+    user_id: int
+    access_token: str
+    id_token: str
 
 
 class TokenStore(ABC):
     """Storage for user tokens received from API."""
 
     @abstractmethod
-    def get(self, user_id: int) -> str | None:
+    async def get(self, user_id: int) -> str | None:
         """
         Gets stored access token for user.
         :param user_id: user ID.
@@ -14,10 +27,41 @@ class TokenStore(ABC):
         pass
 
     @abstractmethod
-    def put(self, user_id: int, token: str) -> None:
+    async def put(
+            self,
+            user_id: int,
+            token: str,
+            id_token: str | None = None
+    ) -> None:
         """
         Puts token for given user.
         :param user_id: user for whom to save this token.
         :param token: access token to save.
+        :param id_token: ID token to renew access token with,
+        kept as long as the access token.
+        """
+        pass
+
+    @abstractmethod
+    async def renewable(self) -> list[RenewableToken]:
+        """
+        Gets tokens that are not expired and can be renewed.
+        :return: tokens stored along with ID tokens.
         """
         pass
+
+    async def lease(self, user_id: int, exp: float) -> bool:
+        """
+        Claims renewal of user token, so that only one of processes
+        sharing the store renews it. Stores used by a single process
+        grant every claim.
+        :param user_id: user ID.
+        :param exp: expiration time of the token to renew,
+        the claim is held until then.
+        :return: `True` if claimed, `False` if another process did.
+        """
+        return True
+
+    async def close(self) -> None:
+        """Writes pending changes and releases resources."""
+        pass
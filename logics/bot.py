@@ -1,16 +1,69 @@
+import enum
 from abc import ABC, abstractmethod
 
-from logics.message import BotMessage
+from logics.message import BotMessage, SentMessage
+
+
+class Priority(enum.IntEnum):
+    """
+    Priority of sending, lower is sent first. Replies the user waits
+    for are interactive, follow-up messages are background ones.
+    """
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class ImageRejectedError(Exception):
+    """Messenger rejected image given by ID of previously sent one."""
+    pass
 
 
 class Bot(ABC):
     """Bot abstraction."""
 
     @abstractmethod
-    async def send_message(self, message: BotMessage, user_id: int) -> None:
+    def render(self, message: BotMessage) -> BotMessage:
+        """
+        Converts message to messenger's format, so that it can be
+        sent several times without converting it again.
+        :param message: message to render.
+        :return: rendered message.
+        """
+        pass
+
+    @abstractmethod
+    async def send_message(
+            self,
+            message: BotMessage,
+            user_id: int,
+            priority: Priority = Priority.INTERACTIVE
+    ) -> SentMessage | None:
         """
         Sends message.
         :param message: message to send.
         :param user_id: ID of receiver.
+        :param priority: priority of message, replies to user
+        are sent before background messages.
+        :return: sent message.
+        :raise ImageRejectedError: if message image is ID of an uploaded
+        image and messenger no longer accepts it.
+        """
+        pass
+
+    @abstractmethod
+    async def edit_message(
+            self,
+            message: BotMessage,
+            user_id: int,
+            message_id: int,
+            priority: Priority = Priority.INTERACTIVE
+    ) -> SentMessage | None:
+        """
+        Replaces text and buttons of previously sent message.
+        :param message: new content of the message.
+        :param user_id: ID of receiver.
+        :param message_id: ID of the message to edit.
+        :param priority: priority of the edit.
+        :return: edited message.
         """
         pass
@@ -0,0 +1,57 @@
+from abc import ABC, abstractmethod
+from typing import Sequence
+
+from dataclasses import dataclass
+
+from logics.message import BotMessage
+
+
+@dataclass
+class InlineResult:
+    """
+    Result of inline query.
+    :param id: unique result ID.
+    :param title: result title.
+    :param message: message sent when result is chosen.
+    :param description: short description.
+    :param thumbnail: thumbnail link.
+    """
+    id: str
+    title: str
+    message: BotMessage
+    description: str | None = None
+    thumbnail: str | None = None
+
+
+@dataclass
+class InlinePage:
+    """
+    Page of inline query results.
+    :param results: results on this page.
+    :param next_offset: offset of the next page, None if it's the last one.
+    :param cache_time: time in seconds messenger may cache this page for.
+    """
+    results: Sequence[InlineResult]
+    next_offset: str | None = None
+    cache_time: int = 0
+
+
+class InlineLogic(ABC):
+    """Handles inline queries from bots."""
+
+    @abstractmethod
+    async def process_inline_query(
+            self,
+            user_id: int,
+            query: str,
+            offset: str
+    ) -> InlinePage | None:
+        """
+        Process inline query from user.
+        :param user_id: ID of sender.
+        :param query: query text.
+        :param offset: offset of requested page, empty for the first one.
+        :return: page of results, or None if query should not be answered,
+        e.g. because it was superseded by a newer one.
+        """
+        pass
@@ -1,4 +1,4 @@
-from typing import Sequence
+from typing import Any, Sequence
 
 from dataclasses import dataclass
 
@@ -20,7 +20,49 @@ class BotMessage:
     Bot message abstraction.
     :param text: message text.
     :param image: image link, or image as bytes.
+    :param buttons: buttons attached to message.
+    :param rendered: whether text is already in messenger's format.
+    :param layout: messenger's layout of buttons, set when rendered.
+    :param source_message_id: ID of bot's message whose button was
+    pressed to send this message, None if message was typed.
     """
     text: str | None = None
     image: str | bytes | None = None
     buttons: Sequence[BotButton] | None = None
+    rendered: bool = False
+    layout: Any = None
+    source_message_id: int | None = None
+
+
+@dataclass
+class SentMessage:
+    """
+    Message that was sent by bot.
+    :param message_id: ID of the message in chat.
+    :param image_id: ID under which attached image was stored
+    by messenger, can be used instead of the image afterward.
+    """
+    message_id: int
+    image_id: str | None = None
+
+
+_static_messages: list[BotMessage] = []
+
+
+def static(message: BotMessage) -> BotMessage:
+    """
+    Marks message as static, i.e. the same on every send, so that
+    bots render it once at start instead of on every send.
+    :param message: message that never changes.
+    :return: the same message.
+    """
+    _static_messages.append(message)
+    return message
+
+
+def static_messages() -> Sequence[BotMessage]:
+    """
+    Gets messages marked as static.
+    :return: static messages.
+    """
+    return tuple(_static_messages)
@@ -0,0 +1,137 @@
+"""
+Compares memory used by audio play models and by compact catalog.
+
+A synthetic catalog with actors and writers shared between audio plays
+is held as pydantic models, then written in compact format and read
+back from memory-mapped file. The search index is filled with the
+compact records too, as it is when the bot warms up from a snapshot,
+e.g.:
+
+    python scripts/bench_catalog_memory.py --plays 10000 100000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from adapters.api.compact_catalog import CompactCatalog, \
+    write_compact_catalog  # noqa
+from adapters.search_index import SearchIndex  # noqa
+from api.model.audio_play import AudioPlay  # noqa
+
+_WORDS = (
+    "doctor dalek master time war lord cyber empire moon silver "
+    "shadow night storm island city ghost machine planet star river"
+).split()
+
+
+def _make_catalog(size: int, seed: int) -> list[AudioPlay]:
+    """
+    Makes random catalog with shared persons and series.
+    :param size: number of audio plays.
+    :param seed: random seed.
+    :return: audio plays, validated like API responses.
+    """
+    rng = random.Random(seed)
+
+    def make_entity(name: str) -> dict:
+        return {"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": name}
+
+    persons = [make_entity(f"Person {i}") for i in range(max(10, size // 20))]
+    series = [make_entity(f"Series {i}") for i in range(max(1, size // 50))]
+    return [AudioPlay.model_validate({
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": " ".join(rng.choices(_WORDS, k=3)).title(),
+        "synopsis": " ".join(rng.choices(_WORDS, k=60)).capitalize() + ".",
+        "release_date": {"date": "2005-03-26", "accuracy": "full"},
+        "writers": rng.sample(persons, rng.randint(1, 2)),
+        "cast": [
+            {"actor": actor, "roles": [rng.choice(_WORDS).title()],
+             "main": rng.random() < 0.5}
+            for actor in rng.sample(persons, rng.randint(2, 8))
+        ],
+        "series": rng.choice(series),
+        "series_season": rng.randint(1, 10),
+        "series_number": rng.randint(1, 20),
+        "episode_type": "regular",
+        "cover_uri": f"https://example.com/covers/{rng.getrandbits(64)}.jpg",
+        "external_resources": [
+            {"resource_type": "streaming",
+             "link": f"https://example.com/{rng.getrandbits(64)}"}
+        ],
+    }) for _ in range(size)]
+
+
+def _measure(plays: int, seed: int) -> None:
+    """
+    Prints memory used by models and by compact catalog.
+    :param plays: number of audio plays.
+    :param seed: random seed.
+    """
+    gc.collect()
+    tracemalloc.start()
+    models = _make_catalog(plays, seed)
+    gc.collect()
+    models_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    path = os.path.join(tempfile.mkdtemp(), "catalog.bin")
+    start = time.perf_counter()
+    write_compact_catalog(path, models)
+    write_time = time.perf_counter() - start
+    file_size = os.path.getsize(path)
+    ids = [a.id for a in models[::max(1, plays // 1000)]]
+    del models
+    gc.collect()
+
+    tracemalloc.start()
+    catalog = CompactCatalog(path)
+    titles = [a.title for a in catalog]
+    opened_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del titles
+
+    tracemalloc.start()
+    index = SearchIndex()
+    index.add_all(catalog)
+    gc.collect()
+    index_size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del index
+    start = time.perf_counter()
+    for audio_play_id in ids:
+        catalog.get(audio_play_id).to_model()
+    lookup_time = (time.perf_counter() - start) / len(ids)
+    catalog.close()
+    os.remove(path)
+
+    mb = 1024 * 1024
+    print(f"{plays} audio plays:")
+    print(f"  models on heap:        {models_size / mb:8.1f} MB")
+    print(f"  compact file (mmap):   {file_size / mb:8.1f} MB, "
+          f"written in {write_time:.2f} s")
+    print(f"  heap with all titles:  {opened_size / mb:8.1f} MB")
+    print(f"  index of records:      {index_size / mb:8.1f} MB")
+    print(f"  lookup by ID + decode: {lookup_time * 1e6:8.1f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plays", type=int, nargs="+",
+                        default=[10000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for plays in args.plays:
+        _measure(plays, args.seed)
+
+
+if __name__ == "__main__":
+    main()
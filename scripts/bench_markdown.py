@@ -0,0 +1,85 @@
+"""
+Compares rendering of /get details messages directly to MarkdownV2
+with building CommonMark and converting it with markdownify, as it
+was done before, e.g.:
+
+    python scripts/bench_markdown.py --plays 1000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from telegramify_markdown import markdownify
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from adapters.handlers.get_audio_play import _make_details_message  # noqa
+from api.model.audio_play import AudioPlay  # noqa
+from bench_catalog_memory import _make_catalog  # noqa
+
+_LOCATION = "https://example.com/self-hosted/audio.mp3"
+
+
+def _make_commonmark_details(audio_play: AudioPlay, location: str) -> str:
+    """
+    Makes details message in CommonMark, as it was done before.
+    :param audio_play: audio play to show.
+    :param location: self-hosted location.
+    :return: message text.
+    """
+    cast = [
+        f"**{c.actor.name}** ({' / '.join(c.roles)})"
+        for c in sorted(audio_play.cast, key=lambda m: not m.main)
+    ]
+    resources = [
+        *(f"{r.resource_type}: [link]({r.link})"
+          for r in audio_play.external_resources),
+        f"self-hosted: [link]({location})",
+    ]
+    return "\n***\n\n".join((
+        "## Synopsis\n" + audio_play.synopsis,
+        "## Cast\n" + "\n".join(cast),
+        "## Links\n" + "\n".join(resources),
+    ))
+
+
+def _time(name: str, render, audio_plays: list[AudioPlay], rounds: int):
+    """
+    Prints mean time of rendering one message.
+    :param name: name of measured path.
+    :param render: renders message of audio play.
+    :param audio_plays: audio plays to render.
+    :param rounds: number of rounds over all audio plays.
+    :return: mean time in seconds.
+    """
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for audio_play in audio_plays:
+            render(audio_play)
+    mean = (time.perf_counter() - start) / rounds / len(audio_plays)
+    print(f"{name:>12}: {mean * 1e6:9.1f} us per message")
+    return mean
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plays", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    audio_plays = _make_catalog(args.plays, 0)
+
+    before = _time("markdownify", lambda a: markdownify(
+        _make_commonmark_details(a, _LOCATION),
+        max_line_length=None,
+        normalize_whitespace=False
+    ), audio_plays, args.rounds)
+    after = _time("direct", lambda a: _make_details_message(
+        a, _LOCATION
+    ).text, audio_plays, args.rounds)
+    print(f"{before / after:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Compares latency of local search index with remote search.
+
+A synthetic catalog is indexed and searched with random queries.
+Remote searches are made through AudioPlayServiceImpl, either to
+a real API, or to a mock transport serving the same catalog with
+given network delay, e.g.:
+
+    python scripts/bench_search.py --plays 10000 --delay 0.05
+    python scripts/bench_search.py --api-base https://example.com/api/
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from adapters.api.audio_play_service_impl import AudioPlayServiceImpl  # noqa
+from adapters.search_index import SearchIndex, tokenize  # noqa
+from api.model.audio_play import AudioPlay, \
+    SearchAudioPlaysResponse  # noqa
+
+_WORDS = (
+    "doctor dalek master time war lord cyber empire moon silver "
+    "shadow night storm island city ghost machine planet star river "
+    "garden winter summer empire crown blood glass iron stone fire"
+).split()
+_NAMES = (
+    "alice bob carol dave erin frank grace heidi ivan judy mallory "
+    "oscar peggy rupert sybil trent victor walter"
+).split()
+
+
+def _make_person(rng: random.Random) -> dict:
+    """
+    Makes random person.
+    :param rng: random generator.
+    :return: person as JSON dict.
+    """
+    name = f"{rng.choice(_NAMES).title()} {rng.choice(_NAMES).title()}s"
+    return {"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": name}
+
+
+def _make_catalog(size: int, seed: int) -> list[dict]:
+    """
+    Makes random catalog.
+    :param size: number of audio plays.
+    :param seed: random seed.
+    :return: audio plays as JSON dicts.
+    """
+    rng = random.Random(seed)
+    series = [
+        {"id": str(uuid.UUID(int=rng.getrandbits(128))),
+         "name": " ".join(rng.choices(_WORDS, k=2)).title()}
+        for _ in range(max(1, size // 50))
+    ]
+    return [{
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "title": " ".join(rng.choices(_WORDS, k=3)).title(),
+        "synopsis": " ".join(rng.choices(_WORDS, k=40)).capitalize() + ".",
+        "release_date": {"date": "2005-03-26", "accuracy": "full"},
+        "writers": [_make_person(rng) for _ in range(rng.randint(1, 2))],
+        "cast": [
+            {"actor": _make_person(rng), "roles": ["Role"], "main": True}
+            for _ in range(rng.randint(2, 8))
+        ],
+        "series": rng.choice(series),
+        "series_season": None,
+        "series_number": None,
+        "episode_type": "regular",
+        "cover_uri": None,
+        "external_resources": [],
+    } for _ in range(size)]
+
+
+def _make_queries(count: int, seed: int) -> list[str]:
+    """
+    Makes random queries of one or two words, the last one cut short.
+    :param count: number of queries.
+    :param seed: random seed.
+    :return: queries.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        words = rng.choices(_WORDS + _NAMES, k=rng.randint(1, 2))
+        words[-1] = words[-1][:rng.randint(3, len(words[-1]))]
+        queries.append(" ".join(words))
+    return queries
+
+
+def _make_transport(
+        catalog: list[dict],
+        delay: float
+) -> httpx.AsyncBaseTransport:
+    """
+    Makes transport answering search requests after a delay.
+    :param catalog: audio plays to search in.
+    :param delay: network delay in seconds.
+    :return: transport.
+    """
+    haystacks = [
+        " ".join((a["title"], a["synopsis"], a["series"]["name"],
+                  *(w["name"] for w in a["writers"]),
+                  *(c["actor"]["name"] for c in a["cast"]))).lower()
+        for a in catalog
+    ]
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(delay)
+        terms = tokenize(request.url.params.get("query", ""))
+        limit = int(request.url.params.get("limit", 50))
+        found = [
+            a for a, h in zip(catalog, haystacks)
+            if all(t in h for t in terms)
+        ][:limit]
+        return httpx.Response(200, json={"audio_plays": found})
+
+    class _Transport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            return await handle(request)
+
+    return _Transport()
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    """
+    Prints latency percentiles.
+    :param name: name of measured path.
+    :param latencies: latencies in seconds.
+    """
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{name:>8}: p50 {p50 * 1000:8.3f} ms, "
+          f"p99 {p99 * 1000:8.3f} ms, n={len(latencies)}")
+
+
+async def _run(args: argparse.Namespace) -> None:
+    catalog = _make_catalog(args.plays, args.seed)
+    queries = _make_queries(args.queries, args.seed)
+
+    start = time.perf_counter()
+    index = SearchIndex()
+    index.add_all(AudioPlay.model_validate(a) for a in catalog)
+    print(f"Indexed {len(index)} audio plays "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    local = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, 50)
+        local.append(time.perf_counter() - start)
+    _report("local", local)
+
+    if args.api_base:
+        client = httpx.AsyncClient()
+        base = args.api_base
+    else:
+        client = httpx.AsyncClient(
+            transport=_make_transport(catalog, args.delay)
+        )
+        base = "http://mock/"
+    aps = AudioPlayServiceImpl(base, client)
+
+    remote = []
+    async with client:
+        for query in queries[:args.remote_queries]:
+            start = time.perf_counter()
+            response = await aps.search(query, 50)
+            remote.append(time.perf_counter() - start)
+            if not isinstance(response, SearchAudioPlaysResponse):
+                print(f"Remote search of '{query}' failed: {response}")
+    _report("remote", remote)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plays", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--remote-queries", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.05,
+                        help="Mock network delay in seconds.")
+    parser.add_argument("--api-base", default=None,
+                        help="Real API to search instead of the mock.")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Checks token store backends behave the same: tokens are returned
+until they expire, replaced on put, dropped when replaced with a token
+of unknown expiration and kept along with ID tokens after reopening.
+Redis backend is checked against an in-process stand-in from
+fakeredis unless URL of a real server is given, e.g.:
+
+    python scripts/check_token_stores.py
+    python scripts/check_token_stores.py --redis-url redis://localhost
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import jwt
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from adapters.api.redis_tokens_impl import RedisTokenStore  # noqa
+from adapters.api.sqlite_tokens_impl import SqliteTokenStore  # noqa
+from adapters.api.tokens_impl import CachedTokenStore, \
+    DictTokenStore  # noqa
+from api.tokens import RenewableToken, TokenStore  # noqa
+
+
+def _make_token(user_id: int, lifetime: float) -> str:
+    """
+    Makes unsigned JWT.
+    :param user_id: subject of token.
+    :param lifetime: seconds until token expires.
+    :return: token.
+    """
+    return jwt.encode(
+        {"sub": str(user_id), "exp": int(time.time() + lifetime)},
+        "secret-key-of-at-least-32-bytes!"
+    )
+
+
+async def _check(
+        name: str,
+        open_store: Callable[[], TokenStore],
+        persistent: bool = True
+) -> None:
+    """
+    Checks store.
+    :param name: name of backend to report.
+    :param open_store: opens store, the same data every time.
+    :param persistent: whether tokens are kept after reopening.
+    """
+    store = open_store()
+    first = _make_token(1, 3600)
+    second = _make_token(1, 7200)
+    expired = _make_token(2, -10)
+
+    assert await store.get(1) is None, "unknown user has token"
+    await store.put(1, first)
+    assert await store.get(1) == first, "token is not returned"
+    await store.put(1, second)
+    assert await store.get(1) == second, "token is not replaced"
+    await store.put(2, expired, "id-2")
+    assert await store.get(2) is None, "expired token is returned"
+    await store.put(3, first, "id-3")
+    await store.put(4, first)
+    await store.put(4, "not-a-jwt")
+    assert await store.get(4) is None, "unreadable token keeps old one"
+    assert await store.renewable() == [RenewableToken(3, first, "id-3")], \
+        "renewable tokens are wrong"
+    await store.close()
+
+    if persistent:
+        store = open_store()
+        assert await store.get(1) == second, "token is lost on reopen"
+        assert await store.get(4) is None, "dropped token is back on reopen"
+        assert await store.renewable() == [
+            RenewableToken(3, first, "id-3")
+        ], "ID token is lost on reopen"
+        await store.close()
+    print(f"{name}: ok")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--redis-url", help="Redis server to check against")
+    args = parser.parse_args()
+
+    await _check("dict", DictTokenStore, persistent=False)
+    await _check(
+        "cached dict",
+        lambda: CachedTokenStore(DictTokenStore()),
+        persistent=False
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = str(Path(directory) / "tokens.sqlite")
+        await _check(
+            "sqlite",
+            lambda: CachedTokenStore(SqliteTokenStore(path))
+        )
+
+    if args.redis_url:
+        import redis.asyncio
+
+        def open_redis() -> TokenStore:
+            return RedisTokenStore(redis.asyncio.Redis.from_url(
+                args.redis_url
+            ))
+    else:
+        import fakeredis
+        server = fakeredis.FakeServer()
+
+        def open_redis() -> TokenStore:
+            return RedisTokenStore(fakeredis.FakeAsyncRedis(server=server))
+    await _check("redis", lambda: CachedTokenStore(open_redis()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
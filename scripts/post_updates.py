@@ -0,0 +1,69 @@
+"""
+Posts recorded updates to a locally running webhook.
+
+Updates are read from a JSON Lines file, one update per line,
+and posted in order, e.g.:
+
+    python scripts/post_updates.py scripts/fixtures/updates.jsonl \
+        --url http://localhost:8443/telegram --secret-token secret
+"""
+import argparse
+import asyncio
+import json
+
+import httpx
+
+_SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def _read_updates(path: str) -> list[dict]:
+    """
+    Reads updates from JSON Lines file, skipping empty lines.
+    :param path: path to file.
+    :return: updates as dicts.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def _post_updates(
+        updates: list[dict],
+        url: str,
+        secret_token: str | None,
+        concurrency: int
+) -> None:
+    """
+    Posts updates to webhook.
+    :param updates: updates to post.
+    :param url: webhook URL.
+    :param secret_token: secret token to send along.
+    :param concurrency: number of updates posted at the same time.
+    """
+    headers = {_SECRET_HEADER: secret_token} if secret_token else {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(headers=headers) as client:
+        async def post(update: dict) -> None:
+            async with semaphore:
+                response = await client.post(url, json=update)
+                print(f"{update.get('update_id')}: {response.status_code}")
+
+        await asyncio.gather(*(post(u) for u in updates))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path", help="JSON Lines file with updates.")
+    parser.add_argument("--url", default="http://localhost:8443/telegram")
+    parser.add_argument("--secret-token", default=None)
+    parser.add_argument("--concurrency", type=int, default=1)
+    args = parser.parse_args()
+
+    updates = _read_updates(args.path)
+    asyncio.run(_post_updates(
+        updates, args.url, args.secret_token, args.concurrency
+    ))
+
+
+if __name__ == "__main__":
+    main()